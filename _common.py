@@ -0,0 +1,85 @@
+"""
+Helpers shared by the standalone test and diagnostic scripts
+Terminal colors, per-thread output capture for checks run concurrently, and
+a cached Supabase client
+"""
+
+import io
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+
+# Colors for terminal output
+class Colors:
+    GREEN = '\033[92m'
+    YELLOW = '\033[93m'
+    RED = '\033[91m'
+    BLUE = '\033[94m'
+    MAGENTA = '\033[95m'
+    CYAN = '\033[96m'
+    BOLD = '\033[1m'
+    END = '\033[0m'
+
+# No ANSI codes when the output is piped to a file
+if not sys.stdout.isatty():
+    for _name in ('GREEN', 'YELLOW', 'RED', 'BLUE', 'MAGENTA', 'CYAN', 'BOLD', 'END'):
+        setattr(Colors, _name, '')
+
+
+class ThreadBufferedStdout:
+    """stdout stand-in that sends each worker thread's output to its own buffer"""
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+
+    def write(self, text):
+        buffer = getattr(self.local, 'buffer', None)
+        return (buffer or self.stream).write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+def run_captured(stdout, fn, label="Test"):
+    """Run a check in a worker thread, returning (result, captured output).
+
+    A check that raises is reported as "<label> crashed" and counts as failed,
+    so it can't abort the run or lose the other checks' output.
+    """
+    buffer = io.StringIO()
+    stdout.local.buffer = buffer
+    try:
+        result = fn()
+    except Exception as e:
+        print(f"{Colors.RED}❌ {label} crashed: {e}{Colors.END}")
+        result = False
+    finally:
+        stdout.local.buffer = None
+    return result, buffer.getvalue()
+
+def run_all_captured(checks, label="Test", max_workers=None):
+    """Run {name: fn} concurrently with each one's output buffered.
+
+    Returns {name: (result, output)} in the order of `checks`; the caller
+    writes the outputs so they print in order, not interleaved.
+    """
+    if not checks:
+        return {}
+    stdout = ThreadBufferedStdout(sys.stdout)
+    sys.stdout = stdout
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers or len(checks)) as ex:
+            futures = {name: ex.submit(run_captured, stdout, fn, label) for name, fn in checks.items()}
+            return {name: future.result() for name, future in futures.items()}
+    finally:
+        sys.stdout = stdout.stream
+
+
+@lru_cache(maxsize=None)
+def get_client(url, key):
+    """One Supabase client per (url, key) for the whole process"""
+    # Imported on first use, so scripts that never talk to Supabase through
+    # the client don't pay for loading it
+    from supabase import create_client
+    return create_client(url, key)
@@ -0,0 +1,20 @@
+"""
+Shared environment for the standalone test scripts
+Parses .env once per process and exposes the settings as constants
+"""
+
+import os
+from dotenv import load_dotenv
+
+# Values already exported in the environment take precedence over .env
+load_dotenv()
+
+SUPABASE_URL = os.getenv("SUPABASE_URL")
+SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY")
+SUPABASE_SERVICE_ROLE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+BACKEND_URL = os.getenv("BACKEND_URL") or os.getenv("VITE_API_URL") or "http://localhost:8000"
+
+
+def missing(**settings):
+    """Names of the given settings that are unset or empty"""
+    return [name for name, value in settings.items() if not value]
@@ -1,11 +1,49 @@
 from fastapi import Depends, HTTPException, Header
+from fastapi.concurrency import run_in_threadpool
 from typing import Optional
-from supabase import create_client
+from cachetools import TTLCache
+import hashlib
+import time
+import jwt
+from .clients.supabase_client import get_supabase_client
 from .config import load_settings
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Recently authenticated tokens: blake2b(token) -> (user, expires_at).
+# Entries live at most AUTH_CACHE_TTL seconds and never past the token's own exp.
+AUTH_CACHE_TTL = 60
+_auth_cache: TTLCache = TTLCache(maxsize=10_000, ttl=AUTH_CACHE_TTL)
+
+
+def _cache_key(token: str) -> bytes:
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+
+def _cache_user(key: bytes, user: dict, exp: Optional[int]):
+    expires_at = time.time() + AUTH_CACHE_TTL
+    if exp:
+        expires_at = min(expires_at, exp)
+    _auth_cache[key] = (user, expires_at)
+
+
+def _verify_jwt(token: str, secret: str) -> Optional[dict]:
+    """Verify a Supabase access token locally and return its claims.
+
+    Returns None when the signature can't be checked with the configured secret,
+    so the caller can fall back to asking Supabase.
+    """
+    try:
+        claims = jwt.decode(token, secret, algorithms=["HS256"], audience="authenticated")
+    except jwt.ExpiredSignatureError as exc:
+        logger.error("❌ Invalid token: expired")
+        raise HTTPException(status_code=401, detail="Invalid token") from exc
+    except jwt.InvalidTokenError as exc:
+        logger.warning(f"⚠️  Local JWT verification failed: {str(exc)}")
+        return None
+    return claims
+
 
 async def get_current_user(authorization: Optional[str] = Header(None)) -> dict:
     logger.info("🔐 Authenticating user...")
@@ -15,17 +53,29 @@ async def get_current_user(authorization: Optional[str] = Header(None)) -> dict:
         raise HTTPException(status_code=401, detail="Missing bearer token")
 
     token = authorization.split(" ", 1)[1]
-    token_preview = token[:10] + "..." if len(token) > 10 else token
-    logger.info(f"   Token: {token_preview}")
-    
+    key = _cache_key(token)
+    cached = _auth_cache.get(key)
+    if cached and cached[1] > time.time():
+        return cached[0]
+
     settings = load_settings()
     if not settings.supabase_url or not settings.supabase_anon_key:
         logger.error("❌ Supabase not configured")
         raise HTTPException(status_code=500, detail="Supabase not configured")
 
-    supabase = create_client(settings.supabase_url, settings.supabase_anon_key)
+    # Fast path: verify the signature locally, no network round-trip
+    if settings.supabase_jwt_secret:
+        claims = _verify_jwt(token, settings.supabase_jwt_secret)
+        if claims and claims.get("sub"):
+            logger.info(f"✅ User authenticated: {claims['sub']}")
+            current_user = {"id": claims["sub"]}
+            _cache_user(key, current_user, claims.get("exp"))
+            return current_user
+
+    # Slow path: ask Supabase to resolve the token (blocking HTTP, so run in the threadpool)
+    supabase = get_supabase_client()
     try:
-        user = supabase.auth.get_user(token)
+        user = await run_in_threadpool(supabase.auth.get_user, token)
     except Exception as exc:
         logger.error(f"❌ Invalid token: {str(exc)}")
         raise HTTPException(status_code=401, detail="Invalid token") from exc
@@ -36,4 +86,11 @@ async def get_current_user(authorization: Optional[str] = Header(None)) -> dict:
 
     logger.info(f"✅ User authenticated: {user.user.id}")
     # Return a simple dict with user id
-    return {"id": user.user.id}
+    current_user = {"id": user.user.id}
+    # Supabase already validated the token, so its exp claim can be read as-is
+    try:
+        exp = jwt.decode(token, options={"verify_signature": False}).get("exp")
+    except jwt.InvalidTokenError:
+        exp = None
+    _cache_user(key, current_user, exp)
+    return current_user
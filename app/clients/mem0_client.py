@@ -1,12 +1,15 @@
+from functools import lru_cache
 from mem0 import Memory
 from ..config import load_settings
 
 
+@lru_cache(maxsize=1)
 def get_mem0_client():
     """
     Initialize Mem0 client with config.
     For now, we use the default in-memory store.
     In production, configure with Supabase vector store or Qdrant.
+    The instance is cached so the LLM/embedder clients are built once per process.
     """
     settings = load_settings()
     config = {}
@@ -31,6 +34,11 @@ def get_mem0_client():
     return Memory.from_config(config)
 
 
+def close_mem0_client():
+    """Drop the cached Mem0 client so its HTTP clients can be released on shutdown."""
+    get_mem0_client.cache_clear()
+
+
 def add_memory_record(user_id: str, memory_id: str, record_id: str, content: str):
     """Register a record with Mem0 for semantic search."""
     try:
@@ -51,17 +59,13 @@ def search_memory_records(user_id: str, memory_id: str, query: str, limit: int =
     """Search relevant records for a given query within a memory context."""
     try:
         mem0 = get_mem0_client()
-        results = mem0.search(
+        # Scope the search to this memory in the vector store itself
+        return mem0.search(
             query,
             user_id=user_id,
             limit=limit,
+            filters={"memory_id": memory_id},
         )
-        # Filter by memory_id
-        filtered = [
-            r for r in results
-            if r.get("metadata", {}).get("memory_id") == memory_id
-        ]
-        return filtered[:limit]
     except Exception as e:
         print(f"Mem0 search failed: {e}")
         return []
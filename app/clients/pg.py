@@ -0,0 +1,48 @@
+from typing import Optional
+from fastapi import HTTPException
+import asyncpg
+import json
+from ..config import load_settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+_pool: Optional[asyncpg.Pool] = None
+
+
+async def _init_connection(conn: asyncpg.Connection):
+    # Decode jsonb (e.g. memory_records.metadata) to Python objects like PostgREST does
+    await conn.set_type_codec("jsonb", encoder=json.dumps, decoder=json.loads, schema="pg_catalog")
+
+
+async def init_pg_pool():
+    """Open the shared asyncpg pool over SUPABASE_DB_URL (called on startup)."""
+    global _pool
+    settings = load_settings()
+    if not settings.supabase_db_url:
+        logger.warning("⚠️  SUPABASE_DB_URL not set; Postgres pool disabled")
+        return
+    # statement_cache_size=0 keeps the pool usable behind Supabase's transaction pooler
+    _pool = await asyncpg.create_pool(
+        dsn=settings.supabase_db_url,
+        min_size=2,
+        max_size=10,
+        statement_cache_size=0,
+        init=_init_connection,
+    )
+    logger.info("✅ Postgres pool ready")
+
+
+async def close_pg_pool():
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+
+
+def get_pg_pool() -> asyncpg.Pool:
+    """FastAPI dependency returning the shared pool."""
+    if _pool is None:
+        logger.error("❌ Database not configured")
+        raise HTTPException(status_code=500, detail="Database not configured")
+    return _pool
@@ -1,3 +1,4 @@
+from functools import lru_cache
 from supabase import create_client, Client
 from ..config import load_settings
 import logging
@@ -5,7 +6,19 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=1)
 def get_supabase_client() -> Client:
+    # Built once per process and shared by all requests so the underlying
+    # HTTP connections are reused instead of re-created per call.
     settings = load_settings()
     logger.debug(f"Creating Supabase client for URL: {settings.supabase_url[:30]}...")
     return create_client(settings.supabase_url, settings.supabase_anon_key)
+
+
+async def supabase_dependency() -> Client:
+    """FastAPI dependency for the shared client.
+
+    Declared async so FastAPI resolves it on the event loop (no threadpool hop),
+    and cached per request like any other dependency.
+    """
+    return get_supabase_client()
@@ -1,25 +1,34 @@
 import os
 from dataclasses import dataclass
+from functools import lru_cache
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
 
-@dataclass
+@dataclass(frozen=True)
 class Settings:
     supabase_url: str
     supabase_anon_key: str
     supabase_service_role_key: str
     supabase_db_url: str
+    supabase_jwt_secret: str = ""
     openai_api_key: str | None = None
+    log_bodies: bool = False
+    log_headers: bool = False
 
 
+@lru_cache(maxsize=1)
 def load_settings() -> Settings:
+    # Environment is read once per process; call load_settings.cache_clear() to reload.
     return Settings(
         supabase_url=os.getenv("SUPABASE_URL", ""),
         supabase_anon_key=os.getenv("SUPABASE_ANON_KEY", ""),
         supabase_service_role_key=os.getenv("SUPABASE_SERVICE_ROLE_KEY", ""),
         supabase_db_url=os.getenv("SUPABASE_DB_URL", ""),
+        supabase_jwt_secret=os.getenv("SUPABASE_JWT_SECRET", ""),
         openai_api_key=os.getenv("OPENAI_API_KEY"),
+        log_bodies=os.getenv("LOG_BODIES") == "1",
+        log_headers=os.getenv("LOG_HEADERS") == "1",
     )
@@ -1,59 +1,99 @@
-from fastapi import FastAPI, Request, status
+from fastapi import FastAPI, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse
 from .routers import memories, records, chat
+from .clients.mem0_client import close_mem0_client
+from .clients.pg import init_pg_pool, close_pg_pool
+from .config import load_settings
+import atexit
 import logging
+import logging.handlers
+import queue
 import time
-import traceback
 
-# Configure logging
+# Configure logging. Records are pushed onto a queue and written to the
+# console/backend.log by a listener thread, keeping disk I/O off the event loop.
+_log_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+_log_handlers = [logging.StreamHandler(), logging.FileHandler('backend.log')]
+for _handler in _log_handlers:
+    _handler.setFormatter(_log_formatter)
+_log_queue = queue.Queue(-1)
+_log_listener = logging.handlers.QueueListener(_log_queue, *_log_handlers, respect_handler_level=True)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler('backend.log')
-    ]
+    format='%(message)s',  # full formatting happens in the listener's handlers
+    handlers=[logging.handlers.QueueHandler(_log_queue)]
 )
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Mem0 Multi-Memory Chat API")
-
-# Add request/response logging middleware
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    start_time = time.time()
-    
-    # Log request details
-    logger.info(f"🔵 Incoming Request: {request.method} {request.url.path}")
-    logger.info(f"   Headers: {dict(request.headers)}")
-    
-    # Read and log body for POST/PUT/PATCH requests
-    if request.method in ["POST", "PUT", "PATCH"]:
-        body = await request.body()
-        logger.info(f"   Body: {body.decode('utf-8') if body else 'empty'}")
-        # Restore body for route handler
-        async def receive():
-            return {"type": "http.request", "body": body}
-        request._receive = receive
-    
-    try:
-        response = await call_next(request)
-        process_time = time.time() - start_time
-        
-        logger.info(f"✅ Response: {request.method} {request.url.path} - Status: {response.status_code} - Time: {process_time:.3f}s")
-        
-        return response
-    except Exception as e:
-        process_time = time.time() - start_time
-        logger.error(f"❌ Error: {request.method} {request.url.path} - Time: {process_time:.3f}s")
-        logger.error(f"   Exception: {str(e)}")
-        logger.error(f"   Traceback: {traceback.format_exc()}")
-        
-        return JSONResponse(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            content={"detail": str(e), "type": type(e).__name__}
-        )
+app = FastAPI(title="Mem0 Multi-Memory Chat API", default_response_class=ORJSONResponse)
+
+# Request/response logging as a pure ASGI middleware: avoids the extra task
+# and Request/Response wrapping that BaseHTTPMiddleware adds to every call.
+class LogRequestsMiddleware:
+    def __init__(self, app):
+        self.app = app
+        # Request headers/bodies are only logged when LOG_HEADERS=1 / LOG_BODIES=1
+        settings = load_settings()
+        self.log_headers = settings.log_headers
+        self.log_bodies = settings.log_bodies
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        method = scope["method"]
+        path = scope["path"]
+        response_started = False
+
+        # Log request details
+        logger.info(f"🔵 Incoming Request: {method} {path}")
+        if self.log_headers and logger.isEnabledFor(logging.INFO):
+            headers = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope["headers"]}
+            logger.info(f"   Headers: {headers}")
+
+        async def receive_wrapper():
+            message = await receive()
+            # Log body chunks as the handler consumes them instead of buffering up front
+            if message["type"] == "http.request":
+                body = message.get("body", b"")
+                logger.info(f"   Body: {body.decode('utf-8', 'replace') if body else 'empty'}")
+            return message
+
+        async def send_wrapper(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+                process_time = time.perf_counter() - start_time
+                logger.info(f"✅ Response: {method} {path} - Status: {message['status']} - Time: {process_time:.3f}s")
+            await send(message)
+
+        log_body = self.log_bodies and method in ("POST", "PUT", "PATCH")
+        try:
+            await self.app(scope, receive_wrapper if log_body else receive, send_wrapper)
+        except Exception as e:
+            process_time = time.perf_counter() - start_time
+            logger.exception(f"❌ Error: {method} {path} - Time: {process_time:.3f}s - Exception: {str(e)}")
+
+            if response_started:
+                raise
+            response = JSONResponse(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                content={"detail": str(e), "type": type(e).__name__}
+            )
+            await response(scope, receive, send)
+
+
+app.add_middleware(LogRequestsMiddleware)
+
+# Compress larger JSON payloads (message/record lists); added before CORS so it runs inside it
+app.add_middleware(GZipMiddleware, minimum_size=1024)
 
 app.add_middleware(
     CORSMiddleware,
@@ -68,6 +108,17 @@ app.include_router(records.router, prefix="/api")
 app.include_router(chat.router, prefix="/api")
 
 
+@app.on_event("startup")
+async def startup():
+    await init_pg_pool()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    await close_pg_pool()
+    close_mem0_client()
+
+
 @app.get("/api/health")
 def health():
     logger.info("Health check called")
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
 from typing import Optional, Literal, Any
 
 
@@ -11,6 +11,15 @@ class MemoryUpdate(BaseModel):
     title: Optional[str] = None
     description: Optional[str] = None
 
+    # Omitting title leaves it unchanged, but memories.title is NOT NULL,
+    # so an explicit null is a 422 rather than a failed update
+    @field_validator("title")
+    @classmethod
+    def title_not_null(cls, v):
+        if v is None:
+            raise ValueError("title cannot be null")
+        return v
+
 
 class RecordCreate(BaseModel):
     content: str
@@ -1,47 +1,50 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse
+from fastapi.concurrency import run_in_threadpool
 from ..auth import get_current_user
-from ..clients.supabase_client import get_supabase_client
+from ..clients.supabase_client import supabase_dependency
+from ..clients.pg import get_pg_pool
 from ..clients.mem0_client import search_memory_records
 from ..models.schemas import ChatSend
+import asyncio
 import logging
-import traceback
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 logger = logging.getLogger(__name__)
 
 
-@router.get("/memories/{memory_id}/messages")
-async def list_messages(memory_id: str, user=Depends(get_current_user)):
+@router.get("/memories/{memory_id}/messages", response_model=None)
+async def list_messages(
+    memory_id: str,
+    limit: int = Query(100, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    user=Depends(get_current_user),
+    pool=Depends(get_pg_pool),
+):
     logger.info(f"💬 Listing messages for memory: {memory_id}, user: {user['id']}")
     try:
-        sb = get_supabase_client()
-        resp = sb.table("chat_messages").select("*").eq("memory_id", memory_id).eq("user_id", user["id"]).order("created_at", desc=True).execute()
-        logger.info(f"   Found {len(resp.data or [])} messages")
-        return resp.data or []
+        async with pool.acquire() as conn:
+            rows = await conn.fetch(
+                "SELECT id, role, content, created_at FROM chat_messages"
+                " WHERE memory_id = $1 AND user_id = $2 ORDER BY created_at DESC LIMIT $3 OFFSET $4",
+                memory_id,
+                user["id"],
+                limit,
+                offset,
+            )
+        logger.info(f"   Found {len(rows)} messages")
+        return ORJSONResponse([dict(r) for r in rows])
     except Exception as e:
-        logger.error(f"❌ Error listing messages: {str(e)}")
-        logger.error(traceback.format_exc())
+        logger.exception(f"❌ Error listing messages: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to list messages: {str(e)}")
 
 
 @router.post("/send")
-async def send_message(payload: ChatSend, user=Depends(get_current_user)):
+async def send_message(payload: ChatSend, user=Depends(get_current_user), sb=Depends(supabase_dependency)):
     logger.info(f"💬 Sending message for memory: {payload.memory_id}, user: {user['id']}")
     logger.info(f"   Message: {payload.message[:100]}..." if len(payload.message) > 100 else f"   Message: {payload.message}")
     
     try:
-        sb = get_supabase_client()
-        
-        # Optional: search for relevant records using Mem0
-        logger.info(f"   Searching relevant records...")
-        relevant_records = search_memory_records(
-            user_id=user["id"],
-            memory_id=payload.memory_id,
-            query=payload.message,
-            limit=3
-        )
-        logger.info(f"   Found {len(relevant_records)} relevant records")
-        
         # Store user message; prune handled by DB trigger
         data = {
             "memory_id": payload.memory_id,
@@ -49,7 +52,23 @@ async def send_message(payload: ChatSend, user=Depends(get_current_user)):
             "role": "user",
             "content": payload.message,
         }
-        user_msg = sb.table("chat_messages").insert(data).select("*").single().execute().data
+
+        # The Mem0 search and the insert are independent blocking calls, so run
+        # them concurrently in the threadpool.
+        logger.info(f"   Searching relevant records...")
+        relevant_records, user_msg = await asyncio.gather(
+            run_in_threadpool(
+                search_memory_records,
+                user_id=user["id"],
+                memory_id=payload.memory_id,
+                query=payload.message,
+                limit=3
+            ),
+            run_in_threadpool(
+                lambda: sb.table("chat_messages").insert(data).select("*").single().execute().data
+            ),
+        )
+        logger.info(f"   Found {len(relevant_records)} relevant records")
         logger.info(f"✅ Message stored: {user_msg['id']}")
         
         # In v1, we only store user messages. 
@@ -59,6 +78,5 @@ async def send_message(payload: ChatSend, user=Depends(get_current_user)):
             "relevant_context": relevant_records  # Optional: can be used by frontend or future LLM
         }
     except Exception as e:
-        logger.error(f"❌ Error sending message: {str(e)}")
-        logger.error(traceback.format_exc())
+        logger.exception(f"❌ Error sending message: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to send message: {str(e)}")
@@ -1,36 +1,47 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse
 from ..auth import get_current_user
-from ..clients.supabase_client import get_supabase_client
+from ..clients.supabase_client import supabase_dependency
+from ..clients.pg import get_pg_pool
 from ..models.schemas import MemoryCreate, MemoryUpdate
 import logging
-import traceback
 
 router = APIRouter(prefix="/memories", tags=["memories"])
 logger = logging.getLogger(__name__)
 
 
-@router.get("")
-async def list_memories(user=Depends(get_current_user)):
+@router.get("", response_model=None)
+async def list_memories(
+    limit: int = Query(100, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    user=Depends(get_current_user),
+    pool=Depends(get_pg_pool),
+):
     logger.info(f"📋 Listing memories for user: {user['id']}")
     try:
-        sb = get_supabase_client()
-        resp = sb.table("memories").select("*").eq("user_id", user["id"]).order("created_at", desc=True).execute()
-        logger.info(f"   Found {len(resp.data or [])} memories")
-        return resp.data or []
+        async with pool.acquire() as conn:
+            rows = await conn.fetch(
+                "SELECT id, title, description, created_at FROM memories"
+                " WHERE user_id = $1 ORDER BY created_at DESC LIMIT $2 OFFSET $3",
+                user["id"],
+                limit,
+                offset,
+            )
+        logger.info(f"   Found {len(rows)} memories")
+        # orjson handles the UUID/datetime values directly, skipping jsonable_encoder
+        return ORJSONResponse([dict(r) for r in rows])
     except Exception as e:
-        logger.error(f"❌ Error listing memories: {str(e)}")
-        logger.error(traceback.format_exc())
+        logger.exception(f"❌ Error listing memories: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to list memories: {str(e)}")
 
 
 @router.post("")
-async def create_memory(payload: MemoryCreate, user=Depends(get_current_user)):
+async def create_memory(payload: MemoryCreate, user=Depends(get_current_user), sb=Depends(supabase_dependency)):
     logger.info(f"✨ Creating memory for user: {user['id']}")
     logger.info(f"   Title: {payload.title}")
     logger.info(f"   Description: {payload.description}")
     
     try:
-        sb = get_supabase_client()
         data = {
             "user_id": user["id"],
             "title": payload.title,
@@ -42,16 +53,15 @@ async def create_memory(payload: MemoryCreate, user=Depends(get_current_user)):
         logger.info(f"✅ Memory created successfully: {resp.data}")
         return resp.data
     except Exception as e:
-        logger.error(f"❌ Error creating memory: {str(e)}")
-        logger.error(f"   Exception type: {type(e).__name__}")
-        logger.error(traceback.format_exc())
+        logger.exception(f"❌ Error creating memory ({type(e).__name__}): {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to create memory: {str(e)}")
 
 
 @router.patch("/{memory_id}")
-async def update_memory(memory_id: str, payload: MemoryUpdate, user=Depends(get_current_user)):
-    sb = get_supabase_client()
-    changes = {k: v for k, v in payload.model_dump().items() if v is not None}
+async def update_memory(memory_id: str, payload: MemoryUpdate, user=Depends(get_current_user), sb=Depends(supabase_dependency)):
+    # Only fields sent by the client; an explicit null clears description
+    # (MemoryUpdate rejects a null title)
+    changes = payload.model_dump(exclude_unset=True)
     if not changes:
         return {"updated": False}
     resp = sb.table("memories").update(changes).eq("id", memory_id).eq("user_id", user["id"]).select("*").single().execute()
@@ -61,7 +71,6 @@ async def update_memory(memory_id: str, payload: MemoryUpdate, user=Depends(get_
 
 
 @router.delete("/{memory_id}")
-async def delete_memory(memory_id: str, user=Depends(get_current_user)):
-    sb = get_supabase_client()
+async def delete_memory(memory_id: str, user=Depends(get_current_user), sb=Depends(supabase_dependency)):
     resp = sb.table("memories").delete().eq("id", memory_id).eq("user_id", user["id"]).execute()
     return {"deleted": True, "count": resp.count}
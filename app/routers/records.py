@@ -1,36 +1,48 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse
 from ..auth import get_current_user
-from ..clients.supabase_client import get_supabase_client
+from ..clients.supabase_client import supabase_dependency
+from ..clients.pg import get_pg_pool
 from ..clients.mem0_client import add_memory_record
 from ..models.schemas import RecordCreate
 import logging
-import traceback
 
 router = APIRouter(prefix="/memories/{memory_id}/records", tags=["records"])
 logger = logging.getLogger(__name__)
 
 
-@router.get("")
-async def list_records(memory_id: str, user=Depends(get_current_user)):
+@router.get("", response_model=None)
+async def list_records(
+    memory_id: str,
+    limit: int = Query(100, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    user=Depends(get_current_user),
+    pool=Depends(get_pg_pool),
+):
     logger.info(f"📝 Listing records for memory: {memory_id}, user: {user['id']}")
     try:
-        sb = get_supabase_client()
-        resp = sb.table("memory_records").select("*").eq("memory_id", memory_id).eq("user_id", user["id"]).order("created_at", desc=True).execute()
-        logger.info(f"   Found {len(resp.data or [])} records")
-        return resp.data or []
+        async with pool.acquire() as conn:
+            rows = await conn.fetch(
+                "SELECT id, content, metadata, created_at FROM memory_records"
+                " WHERE memory_id = $1 AND user_id = $2 ORDER BY created_at DESC LIMIT $3 OFFSET $4",
+                memory_id,
+                user["id"],
+                limit,
+                offset,
+            )
+        logger.info(f"   Found {len(rows)} records")
+        return ORJSONResponse([dict(r) for r in rows])
     except Exception as e:
-        logger.error(f"❌ Error listing records: {str(e)}")
-        logger.error(traceback.format_exc())
+        logger.exception(f"❌ Error listing records: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to list records: {str(e)}")
 
 
 @router.post("")
-async def create_record(memory_id: str, payload: RecordCreate, user=Depends(get_current_user)):
+async def create_record(memory_id: str, payload: RecordCreate, background_tasks: BackgroundTasks, user=Depends(get_current_user), sb=Depends(supabase_dependency)):
     logger.info(f"✨ Creating record for memory: {memory_id}, user: {user['id']}")
     logger.info(f"   Content: {payload.content[:100]}..." if len(payload.content) > 100 else f"   Content: {payload.content}")
     
     try:
-        sb = get_supabase_client()
         data = {
             "memory_id": memory_id,
             "user_id": user["id"],
@@ -41,9 +53,10 @@ async def create_record(memory_id: str, payload: RecordCreate, user=Depends(get_
         record = resp.data
         logger.info(f"✅ Record created: {record['id']}")
         
-        # Register with Mem0 for semantic search
-        logger.info(f"   Registering with Mem0...")
-        add_memory_record(
+        # Register with Mem0 for semantic search once the response is sent
+        logger.info(f"   Scheduling Mem0 registration...")
+        background_tasks.add_task(
+            add_memory_record,
             user_id=user["id"],
             memory_id=memory_id,
             record_id=record["id"],
@@ -52,13 +65,11 @@ async def create_record(memory_id: str, payload: RecordCreate, user=Depends(get_
         
         return record
     except Exception as e:
-        logger.error(f"❌ Error creating record: {str(e)}")
-        logger.error(traceback.format_exc())
+        logger.exception(f"❌ Error creating record: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to create record: {str(e)}")
 
 
 @router.delete("/{record_id}")
-async def delete_record(memory_id: str, record_id: str, user=Depends(get_current_user)):
-    sb = get_supabase_client()
+async def delete_record(memory_id: str, record_id: str, user=Depends(get_current_user), sb=Depends(supabase_dependency)):
     resp = sb.table("memory_records").delete().eq("id", record_id).eq("memory_id", memory_id).eq("user_id", user["id"]).execute()
     return {"deleted": True, "count": resp.count}
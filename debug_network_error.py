@@ -4,63 +4,173 @@ Detailed Network Error Debugger
 This script helps diagnose exactly why the NetworkError is occurring
 """
 
+import argparse
 import os
+import re
 import sys
+import tempfile
+import threading
+import time
+from functools import lru_cache
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
 from dotenv import load_dotenv
 from supabase import create_client
 import subprocess
+from _common import Colors, run_all_captured
 
 load_dotenv()
 
-# Colors
-class Colors:
-    GREEN = '\033[92m'
-    YELLOW = '\033[93m'
-    RED = '\033[91m'
-    BLUE = '\033[94m'
-    MAGENTA = '\033[95m'
-    CYAN = '\033[96m'
-    BOLD = '\033[1m'
-    END = '\033[0m'
+# Shared session: probes to localhost:8000 / :5173 reuse keep-alive connections.
+# main() runs the checks concurrently, so up to three of them (backend detail,
+# browser POST, CORS preflight) hit :8000 at once; pool_maxsize=4 gives each its
+# own pooled connection. No retries, so a refused connection fails immediately.
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=4,
+    max_retries=Retry(total=0, connect=0, read=0),
+))
+
+# (connect, read) timeouts: localhost connects instantly, so cap that at 500ms
+TIMEOUT = (0.5, 2)
+SLOW_TIMEOUT = (0.5, 5)
+
+# Precomputed line prefixes/suffix for the print helpers
+_HEADER = Colors.BOLD + Colors.BLUE
+_RULE = _HEADER + '=' * 70 + Colors.END
+_SUCCESS = Colors.GREEN + "✅ "
+_ERROR = Colors.RED + "❌ "
+_WARNING = Colors.YELLOW + "⚠️  "
+_INFO = Colors.BLUE + "ℹ️  "
+_DETAIL = Colors.CYAN + "   "
+_STEP = "\n" + Colors.BOLD + Colors.MAGENTA + "Step "
+_END = Colors.END
 
 def print_header(text):
-    print(f"\n{Colors.BOLD}{Colors.BLUE}{'='*70}{Colors.END}")
-    print(f"{Colors.BOLD}{Colors.BLUE}{text}{Colors.END}")
-    print(f"{Colors.BOLD}{Colors.BLUE}{'='*70}{Colors.END}\n")
+    sys.stdout.write("\n" + _RULE + "\n" + _HEADER + text + _END + "\n" + _RULE + "\n\n")
 
 def print_success(text):
-    print(f"{Colors.GREEN}✅ {text}{Colors.END}")
+    print(_SUCCESS + text + _END)
 
 def print_error(text):
-    print(f"{Colors.RED}❌ {text}{Colors.END}")
+    print(_ERROR + text + _END)
 
 def print_warning(text):
-    print(f"{Colors.YELLOW}⚠️  {text}{Colors.END}")
+    print(_WARNING + text + _END)
 
 def print_info(text):
-    print(f"{Colors.BLUE}ℹ️  {text}{Colors.END}")
+    print(_INFO + text + _END)
 
 def print_detail(text):
-    print(f"{Colors.CYAN}   {text}{Colors.END}")
+    print(_DETAIL + text + _END)
 
 def print_step(num, text):
-    print(f"\n{Colors.BOLD}{Colors.MAGENTA}Step {num}: {text}{Colors.END}")
+    print(f"{_STEP}{num}: {text}{_END}")
+
+# Successful probe results are remembered for a few seconds so quick re-runs
+# skip them; --force ignores the cache.
+CACHE_FILE = os.path.join(tempfile.gettempdir(), "debug_net_cache.json")
+CACHE_TTL = 10
+_cache_lock = threading.Lock()
+force_recheck = False
+
+def _cache_load():
+    try:
+        with open(CACHE_FILE, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _cache_get(key, ttl=CACHE_TTL):
+    if force_recheck:
+        return None
+    with _cache_lock:
+        entry = _cache_load().get(key)
+    if entry and time.time() - entry[0] < ttl:
+        return entry
+    return None
+
+def _cache_put(key, ok):
+    with _cache_lock:
+        cache = _cache_load()
+        cache[key] = [time.time(), ok]
+        try:
+            with open(CACHE_FILE, 'w') as f:
+                json.dump(cache, f)
+        except OSError:
+            pass
+
+def cached_check(key):
+    """Skip a check whose last successful run is still fresh"""
+    def decorator(fn):
+        def wrapper():
+            entry = _cache_get(key)
+            if entry is not None:
+                print_header(f"{key} (cached)")
+                print_success(f"Passed {time.time() - entry[0]:.0f}s ago (run with --force to re-check)")
+                return entry[1]
+            ok = fn()
+            if ok:
+                _cache_put(key, ok)
+            return ok
+        return wrapper
+    return decorator
+
+def read_preview(response, limit=256):
+    """Read at most `limit` bytes of a streamed body (no JSON parsing) and release it"""
+    try:
+        return response.raw.read(limit, decode_content=True).decode('utf-8', 'replace')
+    finally:
+        response.close()
+
+def send(method, url, **kwargs):
+    """Issue a request on the shared session.
+
+    Returns (response, body preview), or the exception if the request failed.
+    """
+    kwargs.setdefault('timeout', TIMEOUT)
+    try:
+        response = SESSION.request(method, url, stream=True, **kwargs)
+        return response, read_preview(response)
+    except Exception as e:
+        return e
 
+def unwrap(outcome):
+    if isinstance(outcome, Exception):
+        raise outcome
+    return outcome
+
+@cached_check("Backend")
 def check_backend_detailed():
     """Detailed backend check"""
     print_header("Checking Backend Server in Detail")
     
     backend_url = "http://localhost:8000"
     
+    # Fire all three probes back-to-back on the same keep-alive connection,
+    # then report on them in order.
+    test_data = {"title": "Test Memory", "description": "Test"}
+    health, listing, creation = (
+        send("GET", f"{backend_url}/api/health"),
+        send("GET", f"{backend_url}/api/memories"),
+        send(
+            "POST",
+            f"{backend_url}/api/memories",
+            json=test_data,
+            headers={"Content-Type": "application/json"},
+        ),
+    )
+    
     # Test 1: Can we connect at all?
     print_step(1, "Testing basic connectivity")
     try:
-        response = requests.get(f"{backend_url}/api/health", timeout=3)
+        response, body = unwrap(health)
         print_success(f"Backend is reachable")
         print_detail(f"Status Code: {response.status_code}")
-        print_detail(f"Response: {response.json()}")
+        print_detail(f"Response: {body}")
         print_detail(f"Response Time: {response.elapsed.total_seconds():.3f}s")
     except requests.exceptions.ConnectionError as e:
         print_error(f"Cannot connect to backend!")
@@ -77,7 +187,7 @@ def check_backend_detailed():
     # Test 2: Test the actual endpoint that's failing
     print_step(2, "Testing /api/memories endpoint (without auth)")
     try:
-        response = requests.get(f"{backend_url}/api/memories", timeout=3)
+        response, body = unwrap(listing)
         print_detail(f"Status Code: {response.status_code}")
         
         if response.status_code == 401:
@@ -86,10 +196,10 @@ def check_backend_detailed():
             print_success("Endpoint exists, got 403 Forbidden (expected without token)")
         elif response.status_code == 200:
             print_warning("Endpoint returned 200 without auth (unusual)")
-            print_detail(f"Response: {response.json()}")
+            print_detail(f"Response: {body[:200]}")
         else:
             print_warning(f"Unexpected status: {response.status_code}")
-            print_detail(f"Response: {response.text[:200]}")
+            print_detail(f"Response: {body[:200]}")
     except Exception as e:
         print_error(f"Error accessing endpoint: {str(e)}")
         return False
@@ -97,13 +207,7 @@ def check_backend_detailed():
     # Test 3: Check if backend can handle POST to /api/memories
     print_step(3, "Testing POST to /api/memories (without auth)")
     try:
-        test_data = {"title": "Test Memory", "description": "Test"}
-        response = requests.post(
-            f"{backend_url}/api/memories",
-            json=test_data,
-            headers={"Content-Type": "application/json"},
-            timeout=3
-        )
+        response, body = unwrap(creation)
         print_detail(f"Status Code: {response.status_code}")
         
         if response.status_code == 401:
@@ -112,16 +216,25 @@ def check_backend_detailed():
             print_success("POST endpoint returned 403 (expected without token)")
         else:
             print_warning(f"Unexpected status: {response.status_code}")
-            try:
-                print_detail(f"Response: {response.json()}")
-            except:
-                print_detail(f"Response: {response.text[:200]}")
+            print_detail(f"Response: {body[:200]}")
     except Exception as e:
         print_error(f"Error posting to endpoint: {str(e)}")
         return False
     
     return True
 
+@lru_cache(maxsize=8)
+def _parse_env(path, mtime):
+    """Parse KEY=VALUE lines; cached per (path, mtime) so unchanged files aren't re-read"""
+    parsed = {}
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#') and '=' in line:
+                key, value = line.split('=', 1)
+                parsed[key.strip()] = value.strip()
+    return parsed
+
 def check_frontend_config():
     """Check frontend configuration in detail"""
     print_header("Checking Frontend Configuration")
@@ -129,31 +242,20 @@ def check_frontend_config():
     frontend_env = "frontend/.env.local"
     
     print_step(1, "Checking if frontend/.env.local exists")
-    if os.path.exists(frontend_env):
+    try:
+        mtime = os.stat(frontend_env).st_mtime
+    except FileNotFoundError:
+        mtime = None
+    if mtime is not None:
         print_success(f"File exists: {frontend_env}")
         
-        with open(frontend_env, 'r') as f:
-            content = f.read()
+        parsed = _parse_env(frontend_env, mtime)
             
         print_step(2, "Checking environment variables")
         
-        vars_to_check = {
-            'VITE_SUPABASE_URL': None,
-            'VITE_SUPABASE_ANON_KEY': None,
-            'VITE_API_URL': None
-        }
-        
-        for line in content.split('\n'):
-            line = line.strip()
-            if line and not line.startswith('#') and '=' in line:
-                key, value = line.split('=', 1)
-                key = key.strip()
-                value = value.strip()
-                if key in vars_to_check:
-                    vars_to_check[key] = value
-        
         all_ok = True
-        for var, value in vars_to_check.items():
+        for var in ('VITE_SUPABASE_URL', 'VITE_SUPABASE_ANON_KEY', 'VITE_API_URL'):
+            value = parsed.get(var)
             if value:
                 display_value = value[:30] + "..." if len(value) > 30 else value
                 print_success(f"{var} = {display_value}")
@@ -162,8 +264,8 @@ def check_frontend_config():
                 all_ok = False
         
         # Check VITE_API_URL specifically
-        if vars_to_check.get('VITE_API_URL'):
-            api_url = vars_to_check['VITE_API_URL']
+        if parsed.get('VITE_API_URL'):
+            api_url = parsed['VITE_API_URL']
             if api_url == 'http://localhost:8000':
                 print_success("VITE_API_URL is correctly set to http://localhost:8000")
             else:
@@ -175,13 +277,14 @@ def check_frontend_config():
         print_error(f"Frontend .env.local not found at: {frontend_env}")
         return False
 
+@cached_check("Frontend")
 def check_frontend_running():
     """Check if frontend is actually running"""
     print_header("Checking Frontend Server")
     
     print_step(1, "Testing if frontend is accessible")
     try:
-        response = requests.get("http://localhost:5173", timeout=5)
+        response = SESSION.get("http://localhost:5173", timeout=SLOW_TIMEOUT)
         if response.status_code == 200:
             print_success("Frontend is running on http://localhost:5173")
             return True
@@ -199,49 +302,77 @@ def check_frontend_running():
         print_error(f"Error checking frontend: {str(e)}")
         return False
 
+def scan_proc(patterns):
+    """Single pass over /proc; returns {pattern: [pid, ...]}
+
+    Matches on the short /proc/<pid>/comm name and only reads the full
+    cmdline for interpreter processes (e.g. `python -m uvicorn`, or vite
+    running under node).
+    """
+    found = {pattern: [] for pattern in patterns}
+    own_pid = os.getpid()
+    for entry in os.scandir('/proc'):
+        if not entry.name.isdigit() or int(entry.name) == own_pid:
+            continue
+        try:
+            with open(f'/proc/{entry.name}/comm', 'rb') as f:
+                name = f.read().rstrip(b'\n')
+            if name.startswith((b'node', b'python')):
+                with open(f'/proc/{entry.name}/cmdline', 'rb') as f:
+                    name = f.read()
+        except (FileNotFoundError, PermissionError, ProcessLookupError):
+            continue
+        for pattern in patterns:
+            if pattern in name:
+                found[pattern].append(int(entry.name))
+    return found
+
+def pgrep(pattern):
+    """Fallback for systems without /proc (e.g. macOS)"""
+    # Stream PIDs line by line instead of buffering and decoding all output
+    with subprocess.Popen(['pgrep', '-f', pattern], stdout=subprocess.PIPE) as proc:
+        return [int(line) for line in proc.stdout]
+
+def find_processes():
+    """Return {'uvicorn': [pids], 'vite': [pids]}"""
+    if os.path.isdir('/proc'):
+        found = scan_proc([b'uvicorn', b'vite'])
+        return {'uvicorn': found[b'uvicorn'], 'vite': found[b'vite']}
+    return {'uvicorn': pgrep('uvicorn'), 'vite': pgrep('vite')}
+
 def check_processes():
     """Check what processes are running"""
     print_header("Checking Running Processes")
     
-    print_step(1, "Looking for backend processes")
     try:
-        result = subprocess.run(
-            ['pgrep', '-f', 'uvicorn'],
-            capture_output=True,
-            text=True
-        )
-        if result.stdout.strip():
-            pids = result.stdout.strip().split('\n')
-            print_success(f"Found {len(pids)} uvicorn process(es)")
-            for pid in pids:
-                print_detail(f"PID: {pid}")
-        else:
-            print_error("No uvicorn processes found!")
-            print_warning("Backend is not running")
+        processes = find_processes()
     except Exception as e:
         print_warning(f"Could not check processes: {e}")
+        return
+    
+    print_step(1, "Looking for backend processes")
+    pids = processes['uvicorn']
+    if pids:
+        print_success(f"Found {len(pids)} uvicorn process(es)")
+        for pid in pids:
+            print_detail(f"PID: {pid}")
+    else:
+        print_error("No uvicorn processes found!")
+        print_warning("Backend is not running")
     
     print_step(2, "Looking for frontend processes")
-    try:
-        result = subprocess.run(
-            ['pgrep', '-f', 'vite'],
-            capture_output=True,
-            text=True
-        )
-        if result.stdout.strip():
-            pids = result.stdout.strip().split('\n')
-            print_success(f"Found {len(pids)} vite process(es)")
-            for pid in pids:
-                print_detail(f"PID: {pid}")
-            
-            if len(pids) > 1:
-                print_warning(f"Multiple vite processes detected! This might cause issues.")
-                print_warning("Consider restarting frontend: ./restart_frontend.sh")
-        else:
-            print_error("No vite processes found!")
-            print_warning("Frontend is not running")
-    except Exception as e:
-        print_warning(f"Could not check processes: {e}")
+    pids = processes['vite']
+    if pids:
+        print_success(f"Found {len(pids)} vite process(es)")
+        for pid in pids:
+            print_detail(f"PID: {pid}")
+        
+        if len(pids) > 1:
+            print_warning(f"Multiple vite processes detected! This might cause issues.")
+            print_warning("Consider restarting frontend: ./restart_frontend.sh")
+    else:
+        print_error("No vite processes found!")
+        print_warning("Frontend is not running")
 
 def check_browser_access():
     """Simulate what the browser is doing"""
@@ -265,15 +396,16 @@ def check_browser_access():
     print_step(2, "Attempting request WITHOUT authentication")
     
     try:
-        response = requests.post(
+        response, body = unwrap(send(
+            "POST",
             f"{backend_url}{endpoint}",
             json={"title": "Test Memory", "description": "Test Description"},
             headers={
                 "Content-Type": "application/json",
                 "Origin": "http://localhost:5173"  # Simulate browser origin
             },
-            timeout=5
-        )
+            timeout=SLOW_TIMEOUT
+        ))
         
         print_detail(f"Status Code: {response.status_code}")
         print_detail(f"Response Headers: {dict(response.headers)}")
@@ -284,10 +416,7 @@ def check_browser_access():
             print_info("The issue is likely in the frontend not sending the request")
         else:
             print_warning(f"Got unexpected status: {response.status_code}")
-            try:
-                print_detail(f"Response body: {response.json()}")
-            except:
-                print_detail(f"Response body: {response.text[:200]}")
+            print_detail(f"Response body: {body[:200]}")
         
         return True
         
@@ -313,6 +442,7 @@ def check_browser_access():
         print_error(f"Unexpected error: {str(e)}")
         return False
 
+@cached_check("CORS")
 def check_cors():
     """Check CORS preflight"""
     print_header("Checking CORS Configuration")
@@ -322,14 +452,14 @@ def check_cors():
     print_step(1, "Simulating CORS preflight request")
     
     try:
-        response = requests.options(
+        response = SESSION.options(
             f"{backend_url}/api/memories",
             headers={
                 "Origin": "http://localhost:5173",
                 "Access-Control-Request-Method": "POST",
                 "Access-Control-Request-Headers": "Content-Type,Authorization"
             },
-            timeout=5
+            timeout=SLOW_TIMEOUT
         )
         
         print_detail(f"Status Code: {response.status_code}")
@@ -358,6 +488,10 @@ def check_cors():
         print_error(f"CORS check failed: {str(e)}")
         return False
 
+# Log line matchers, applied to raw bytes so only matching lines get decoded
+ERROR_RE = re.compile('ERROR|❌|Error'.encode())
+MEMORY_POST_RE = re.compile(rb'POST.*?/api/memories')
+
 def analyze_logs():
     """Check backend logs for errors"""
     print_header("Analyzing Backend Logs")
@@ -371,14 +505,24 @@ def analyze_logs():
     print_step(1, "Looking for recent errors in backend.log")
     
     try:
-        with open(log_file, 'r') as f:
-            lines = f.readlines()
-        
-        # Get last 50 lines
-        recent_lines = lines[-50:] if len(lines) > 50 else lines
+        # Only read the tail of the file to get the last 50 lines
+        size = os.path.getsize(log_file)
+        offset = max(0, size - 16384)
+        with open(log_file, 'rb') as f:
+            f.seek(offset)
+            lines = f.read().splitlines()
+        if offset:
+            lines = lines[1:]  # first line is probably cut in half
+        recent_lines = lines[-50:]
         
-        # Look for errors
-        errors = [line for line in recent_lines if 'ERROR' in line or '❌' in line or 'Error' in line]
+        # Look for errors and recent POST to /api/memories in one pass
+        errors = []
+        memory_posts = []
+        for line in recent_lines:
+            if ERROR_RE.search(line):
+                errors.append(line.decode('utf-8', 'replace'))
+            if MEMORY_POST_RE.search(line):
+                memory_posts.append(line.decode('utf-8', 'replace'))
         
         if errors:
             print_warning(f"Found {len(errors)} recent error(s):")
@@ -387,9 +531,6 @@ def analyze_logs():
         else:
             print_success("No recent errors in backend.log")
         
-        # Look for recent POST to /api/memories
-        memory_posts = [line for line in recent_lines if 'POST' in line and '/api/memories' in line]
-        
         if memory_posts:
             print_info(f"Found {len(memory_posts)} recent POST /api/memories request(s)")
             print_detail("Last request:")
@@ -402,6 +543,11 @@ def analyze_logs():
         print_error(f"Could not read log file: {e}")
 
 def main():
+    global force_recheck
+    parser = argparse.ArgumentParser(description="Diagnose frontend/backend NetworkErrors")
+    parser.add_argument("--force", action="store_true", help="ignore cached results of recent successful probes")
+    force_recheck = parser.parse_args().force
+    
     print(f"\n{Colors.BOLD}{'='*70}")
     print("  DETAILED NETWORK ERROR DEBUGGER")
     print(f"{'='*70}{Colors.END}\n")
@@ -411,14 +557,27 @@ def main():
     
     results = {}
     
-    # Run all checks
-    results['Backend Running'] = check_backend_detailed()
-    results['Frontend Config'] = check_frontend_config()
-    results['Frontend Running'] = check_frontend_running()
-    check_processes()
-    results['Browser Simulation'] = check_browser_access()
-    results['CORS'] = check_cors()
-    analyze_logs()
+    # Run all checks concurrently; each check's output is buffered and
+    # printed in the original order once everything has finished.
+    checks = {
+        'Backend Running': check_backend_detailed,
+        'Frontend Config': check_frontend_config,
+        'Frontend Running': check_frontend_running,
+        'Processes': check_processes,
+        'Browser Simulation': check_browser_access,
+        'CORS': check_cors,
+        'Logs': analyze_logs,
+    }
+    try:
+        outputs = run_all_captured(checks, label="Check")
+    finally:
+        SESSION.close()
+    
+    for name, (result, output) in outputs.items():
+        sys.stdout.write(output)
+        # check_processes / analyze_logs are informational only
+        if name not in ('Processes', 'Logs'):
+            results[name] = result
     
     # Final diagnosis
     print_header("DIAGNOSIS & RECOMMENDATIONS")
@@ -484,54 +643,58 @@ def main():
     print()
     print_header("BROWSER DEBUGGING INSTRUCTIONS")
     
-    print(f"{Colors.BOLD}When you try to create a memory in the browser:{Colors.END}")
-    print()
-    print("1. Open DevTools (F12)")
-    print()
-    print("2. Console Tab - Look for:")
-    print_detail("🔵 API Call: POST /memories {title: '...'}")
-    print_detail("   ↓")
-    print_detail("📡 Response: POST /memories - Status: XXX")
-    print_detail("   ↓")
-    print_detail("✅ Success OR ❌ Error")
-    print()
-    print("   If you DON'T see these logs:")
-    print_detail("→ Frontend code isn't running properly")
-    print_detail("→ Hard refresh: Ctrl+Shift+R")
-    print()
-    print("3. Network Tab - Look for:")
-    print_detail("POST request to /api/memories")
-    print_detail("Click on it to see:")
-    print_detail("  • Status: Should be 200, 401, or 403")
-    print_detail("  • Headers: Check Request URL")
-    print_detail("  • Response: Check error message")
-    print()
-    print("   If request is RED (failed):")
-    print_detail("→ This is the NetworkError")
-    print_detail("→ Click on it and look at error details")
-    print_detail("→ Common: 'Failed to fetch' = Can't reach backend")
-    print()
-    print("4. Check what URL is being called:")
-    print_detail("In Console, type: import.meta.env.VITE_API_URL")
-    print_detail("Should output: http://localhost:8000")
-    print_detail("If undefined: Frontend env vars not loaded → restart frontend")
-    print()
+    sys.stdout.write("\n".join([
+        f"{Colors.BOLD}When you try to create a memory in the browser:{Colors.END}",
+        "",
+        "1. Open DevTools (F12)",
+        "",
+        "2. Console Tab - Look for:",
+        _DETAIL + "🔵 API Call: POST /memories {title: '...'}" + _END,
+        _DETAIL + "   ↓" + _END,
+        _DETAIL + "📡 Response: POST /memories - Status: XXX" + _END,
+        _DETAIL + "   ↓" + _END,
+        _DETAIL + "✅ Success OR ❌ Error" + _END,
+        "",
+        "   If you DON'T see these logs:",
+        _DETAIL + "→ Frontend code isn't running properly" + _END,
+        _DETAIL + "→ Hard refresh: Ctrl+Shift+R" + _END,
+        "",
+        "3. Network Tab - Look for:",
+        _DETAIL + "POST request to /api/memories" + _END,
+        _DETAIL + "Click on it to see:" + _END,
+        _DETAIL + "  • Status: Should be 200, 401, or 403" + _END,
+        _DETAIL + "  • Headers: Check Request URL" + _END,
+        _DETAIL + "  • Response: Check error message" + _END,
+        "",
+        "   If request is RED (failed):",
+        _DETAIL + "→ This is the NetworkError" + _END,
+        _DETAIL + "→ Click on it and look at error details" + _END,
+        _DETAIL + "→ Common: 'Failed to fetch' = Can't reach backend" + _END,
+        "",
+        "4. Check what URL is being called:",
+        _DETAIL + "In Console, type: import.meta.env.VITE_API_URL" + _END,
+        _DETAIL + "Should output: http://localhost:8000" + _END,
+        _DETAIL + "If undefined: Frontend env vars not loaded → restart frontend" + _END,
+        "",
+    ]) + "\n")
     
     print_header("IMMEDIATE ACTION ITEMS")
-    print()
-    print(f"{Colors.BOLD}Run these commands:{Colors.END}")
-    print()
-    print("1. Restart frontend:")
-    print(f"   {Colors.CYAN}./restart_frontend.sh{Colors.END}")
-    print()
-    print("2. Open browser and check console:")
-    print(f"   {Colors.CYAN}http://localhost:5173{Colors.END}")
-    print(f"   {Colors.CYAN}Press F12 for DevTools{Colors.END}")
-    print()
-    print("3. Try creating memory and watch:")
-    print(f"   {Colors.CYAN}Console tab - for API logs{Colors.END}")
-    print(f"   {Colors.CYAN}Network tab - for failed requests{Colors.END}")
-    print()
+    sys.stdout.write("\n".join([
+        "",
+        f"{Colors.BOLD}Run these commands:{Colors.END}",
+        "",
+        "1. Restart frontend:",
+        f"   {Colors.CYAN}./restart_frontend.sh{Colors.END}",
+        "",
+        "2. Open browser and check console:",
+        f"   {Colors.CYAN}http://localhost:5173{Colors.END}",
+        f"   {Colors.CYAN}Press F12 for DevTools{Colors.END}",
+        "",
+        "3. Try creating memory and watch:",
+        f"   {Colors.CYAN}Console tab - for API logs{Colors.END}",
+        f"   {Colors.CYAN}Network tab - for failed requests{Colors.END}",
+        "",
+    ]) + "\n")
 
 if __name__ == "__main__":
     try:
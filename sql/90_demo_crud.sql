@@ -0,0 +1,90 @@
+-- 90_demo_crud.sql
+-- Requires: 20_memory_records.sql, 30_chat_messages.sql
+-- Optional: used by demo_supabase_test.py (--rpc mode and the FK check)
+
+-- Runs the demo CRUD checks server-side in one call and returns
+-- {"<test name>": true/false, ...}. All test rows are removed before returning.
+create or replace function public.run_demo_crud(p_user uuid)
+returns jsonb as $$
+declare
+  v_memory uuid;
+  v_count int;
+  v_result jsonb := '{}'::jsonb;
+begin
+  -- Memories CRUD
+  insert into public.memories (user_id, title, description)
+  values (p_user, 'Demo Memory ' || to_char(now(), 'HH24:MI:SS'), 'This is a test memory created by demo tool')
+  returning id into v_memory;
+
+  update public.memories set description = 'Updated at ' || to_char(now(), 'HH24:MI:SS')
+  where id = v_memory;
+  get diagnostics v_count = row_count;
+  v_result := v_result || jsonb_build_object('Memories CRUD', v_count = 1);
+
+  -- Memory Records CRUD
+  insert into public.memory_records (memory_id, user_id, content)
+  select v_memory, p_user, 'Record ' || i || ': ' || to_char(now(), 'HH24:MI:SS')
+  from generate_series(1, 4) as i;
+
+  update public.memory_records set content = 'Updated record at ' || to_char(now(), 'HH24:MI:SS')
+  where id = (select id from public.memory_records where memory_id = v_memory limit 1);
+
+  select count(*) into v_count from public.memory_records where memory_id = v_memory;
+  v_result := v_result || jsonb_build_object('Memory Records CRUD', v_count = 4);
+
+  -- Chat Messages CRUD
+  insert into public.chat_messages (memory_id, user_id, role, content)
+  values
+    (v_memory, p_user, 'user', 'This is a test user message'),
+    (v_memory, p_user, 'assistant', 'This is a test assistant response'),
+    (v_memory, p_user, 'user', 'What''s 2+2?'),
+    (v_memory, p_user, 'assistant', '2+2 equals 4'),
+    (v_memory, p_user, 'user', 'Thanks!'),
+    (v_memory, p_user, 'assistant', 'You''re welcome!');
+
+  select count(*) into v_count from public.chat_messages where memory_id = v_memory;
+  v_result := v_result || jsonb_build_object('Chat Messages CRUD', v_count = 6);
+
+  -- Foreign Key Constraints (each insert must be rejected)
+  begin
+    insert into public.memory_records (memory_id, user_id, content)
+    values (gen_random_uuid(), p_user, 'This should fail');
+    v_result := v_result || jsonb_build_object('Foreign Key Constraints', false);
+  exception when foreign_key_violation then
+    begin
+      insert into public.chat_messages (memory_id, user_id, role, content)
+      values (gen_random_uuid(), p_user, 'user', 'This should fail');
+      v_result := v_result || jsonb_build_object('Foreign Key Constraints', false);
+    exception when foreign_key_violation then
+      v_result := v_result || jsonb_build_object('Foreign Key Constraints', true);
+    end;
+  end;
+
+  -- Cascade Delete: removing the memory must remove its records and messages
+  delete from public.memories where id = v_memory;
+  select (select count(*) from public.memory_records where memory_id = v_memory)
+       + (select count(*) from public.chat_messages where memory_id = v_memory)
+  into v_count;
+  v_result := v_result || jsonb_build_object('Cascade Delete', v_count = 0);
+
+  return v_result;
+end;
+$$ language plpgsql;
+
+-- Service role only; this writes test rows for arbitrary users.
+revoke all on function public.run_demo_crud(uuid) from public, anon, authenticated;
+grant execute on function public.run_demo_crud(uuid) to service_role;
+
+-- Tables with a foreign key to memories; lets the demo confirm the FK
+-- constraints from catalog metadata instead of attempting failing inserts.
+create or replace function public.check_fks()
+returns text[] as $$
+  select coalesce(array_agg(conrelid::regclass::text order by conrelid::regclass::text), '{}')
+  from pg_constraint
+  where contype = 'f'
+    and confrelid = 'public.memories'::regclass
+    and conrelid in ('public.memory_records'::regclass, 'public.chat_messages'::regclass);
+$$ language sql stable;
+
+revoke all on function public.check_fks() from public, anon, authenticated;
+grant execute on function public.check_fks() to service_role;
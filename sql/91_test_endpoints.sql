@@ -0,0 +1,25 @@
+-- 91_test_endpoints.sql
+-- Requires: 20_memory_records.sql, 30_chat_messages.sql
+-- Optional: used by test_endpoints.py (table and RLS checks)
+
+-- Reports which of the given public tables exist, so the table check is one
+-- round trip instead of one probe query per table.
+create or replace function public.check_tables(names text[])
+returns table(name text, "exists" boolean) as $$
+  select n, to_regclass(format('public.%I', n)) is not null
+  from unnest(names) as n;
+$$ language sql stable;
+
+grant execute on function public.check_tables(text[]) to anon, authenticated, service_role;
+
+-- Reports the calling role and whether it can see any memories under RLS;
+-- called once with each key instead of selecting rows from the table.
+create or replace function public.check_rls()
+returns jsonb as $$
+  select jsonb_build_object(
+    'role', current_user,
+    'can_see', exists(select 1 from public.memories)
+  );
+$$ language sql stable security invoker;
+
+grant execute on function public.check_rls() to anon, authenticated, service_role;
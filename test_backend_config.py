@@ -4,12 +4,10 @@ Test Backend Configuration
 Verify that backend can load Supabase configuration correctly
 """
 
-import os
+import asyncio
 import sys
-import requests
-from dotenv import load_dotenv
-
-load_dotenv()
+import httpx
+from _env import BACKEND_URL
 
 # Colors
 GREEN = '\033[92m'
@@ -18,26 +16,50 @@ BLUE = '\033[94m'
 BOLD = '\033[1m'
 END = '\033[0m'
 
+# Precomputed line prefixes for the print helpers
+_RULE = f"{BOLD}{BLUE}{'='*70}{END}"
+_HEADER = BOLD + BLUE
+_SUCCESS = GREEN + "✅ "
+_ERROR = RED + "❌ "
+_INFO = BLUE + "ℹ️  "
+
 def print_header(text):
-    print(f"\n{BOLD}{BLUE}{'='*70}{END}")
-    print(f"{BOLD}{BLUE}{text}{END}")
-    print(f"{BOLD}{BLUE}{'='*70}{END}\n")
+    print("\n" + _RULE + "\n" + _HEADER + text + END + "\n" + _RULE + "\n")
 
 def print_success(text):
-    print(f"{GREEN}✅ {text}{END}")
+    print(_SUCCESS + text + END)
 
 def print_error(text):
-    print(f"{RED}❌ {text}{END}")
+    print(_ERROR + text + END)
 
 def print_info(text):
-    print(f"{BLUE}ℹ️  {text}{END}")
+    print(_INFO + text + END)
 
 print_header("Testing Backend Configuration Fix")
 
+async def run_probes():
+    """Send the three independent requests concurrently over one pooled client"""
+    async with httpx.AsyncClient(base_url=BACKEND_URL, timeout=5.0) as client:
+        return await asyncio.gather(
+            client.get("/api/health"),
+            client.get("/api/memories"),
+            client.post("/api/memories", json={"title": "Test", "description": "Test"}),
+            return_exceptions=True,
+        )
+
+def unwrap(result):
+    """Re-raise a probe's exception so each check below reports it as before"""
+    if isinstance(result, Exception):
+        raise result
+    return result
+
+# The responses are checked in order below
+health_result, list_result, create_result = asyncio.run(run_probes())
+
 # Test 1: Backend health check
 print_info("Test 1: Backend health check...")
 try:
-    response = requests.get("http://localhost:8000/api/health", timeout=5)
+    response = unwrap(health_result)
     if response.status_code == 200:
         print_success("Backend is running")
     else:
@@ -50,7 +72,7 @@ except Exception as e:
 # Test 2: Try to call memories endpoint without auth (should get 401, NOT 500)
 print_info("Test 2: Testing memories endpoint without authentication...")
 try:
-    response = requests.get("http://localhost:8000/api/memories", timeout=5)
+    response = unwrap(list_result)
     
     if response.status_code == 401:
         print_success("Got 401 Unauthorized (expected - need to log in)")
@@ -77,12 +99,7 @@ except Exception as e:
 # Test 3: Try POST without auth (should also get 401, NOT 500)
 print_info("Test 3: Testing POST /api/memories without authentication...")
 try:
-    response = requests.post(
-        "http://localhost:8000/api/memories",
-        json={"title": "Test", "description": "Test"},
-        headers={"Content-Type": "application/json"},
-        timeout=5
-    )
+    response = unwrap(create_result)
     
     if response.status_code == 401:
         print_success("Got 401 Unauthorized (expected)")
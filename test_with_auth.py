@@ -4,43 +4,50 @@ Test endpoints with proper authentication
 This tests the full flow through the API endpoints
 """
 
-import os
 import sys
 import requests
-from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
 import json
+from _common import Colors
+from _env import BACKEND_URL
 
-load_dotenv()
+# Shared session: /api/health and /api/memories go over one keep-alive
+# connection (same client port in uvicorn's access log)
+SESSION = requests.Session()
+_adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+SESSION.mount("http://", _adapter)
+SESSION.mount("https://", _adapter)
 
-BACKEND_URL = os.getenv("VITE_API_URL", "http://localhost:8000")
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY")
+DEFAULT_TIMEOUT = 5
 
-# Colors
-class Colors:
-    GREEN = '\033[92m'
-    YELLOW = '\033[93m'
-    RED = '\033[91m'
-    BLUE = '\033[94m'
-    BOLD = '\033[1m'
-    END = '\033[0m'
+def request(method, url, **kwargs):
+    """Send a request over SESSION, applying DEFAULT_TIMEOUT unless given"""
+    kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+    return SESSION.request(method, url, **kwargs)
+
+# Precomputed line prefixes for the print helpers
+_HEADER = Colors.BOLD + Colors.BLUE
+_RULE = _HEADER + '=' * 70 + Colors.END
+_SUCCESS = Colors.GREEN + "✅ "
+_ERROR = Colors.RED + "❌ "
+_INFO = Colors.BLUE + "ℹ️  "
+_WARNING = Colors.YELLOW + "⚠️  "
+_END = Colors.END
 
 def print_header(text):
-    print(f"\n{Colors.BOLD}{Colors.BLUE}{'='*70}{Colors.END}")
-    print(f"{Colors.BOLD}{Colors.BLUE}{text}{Colors.END}")
-    print(f"{Colors.BOLD}{Colors.BLUE}{'='*70}{Colors.END}\n")
+    print("\n" + _RULE + "\n" + _HEADER + text + _END + "\n" + _RULE + "\n")
 
 def print_success(text):
-    print(f"{Colors.GREEN}✅ {text}{Colors.END}")
+    print(_SUCCESS + text + _END)
 
 def print_error(text):
-    print(f"{Colors.RED}❌ {text}{Colors.END}")
+    print(_ERROR + text + _END)
 
 def print_info(text):
-    print(f"{Colors.BLUE}ℹ️  {text}{Colors.END}")
+    print(_INFO + text + _END)
 
 def print_warning(text):
-    print(f"{Colors.YELLOW}⚠️  {text}{Colors.END}")
+    print(_WARNING + text + _END)
 
 def main():
     print_header("API Endpoint Testing (Authentication Required)")
@@ -52,9 +59,9 @@ def main():
     # Test health endpoint (no auth required)
     print_info("Testing /api/health (no auth required)...")
     try:
-        response = requests.get(f"{BACKEND_URL}/api/health", timeout=5)
+        response = request("GET", f"{BACKEND_URL}/api/health")
         if response.status_code == 200:
-            print_success(f"Health check passed: {response.json()}")
+            print_success(f"Health check passed: {response.text[:200]}")
         else:
             print_error(f"Health check failed: {response.status_code}")
     except Exception as e:
@@ -71,7 +78,7 @@ def main():
     print_warning("This requires a valid auth token from Supabase")
     
     try:
-        response = requests.get(f"{BACKEND_URL}/api/memories", timeout=5)
+        response = request("GET", f"{BACKEND_URL}/api/memories")
         if response.status_code == 401:
             print_info("Got 401 Unauthorized (expected without token)")
             print_success("Endpoint is working correctly - authentication is required")
@@ -80,7 +87,7 @@ def main():
             print_success("Endpoint is working correctly - authorization is enforced")
         elif response.status_code == 200:
             print_warning("Got 200 OK - This means you're somehow already authenticated")
-            print_info(f"Response: {response.json()}")
+            print_info(f"Response: {response.text[:200]}")
         else:
             print_warning(f"Unexpected status code: {response.status_code}")
     except Exception as e:
@@ -0,0 +1,94 @@
+"""Retry behaviour of the demo's raw PostgREST inserts"""
+
+import unittest
+import uuid
+from unittest import mock
+
+import httpx
+import orjson
+
+import demo_supabase_test
+from demo_supabase_test import SupabaseDemo
+
+
+def make_demo(handler):
+    """SupabaseDemo wired to a mock transport, skipping the real __init__"""
+    demo = SupabaseDemo.__new__(SupabaseDemo)
+    demo.http = httpx.Client(transport=httpx.MockTransport(handler))
+    demo.rest_url = "https://example.supabase.co/rest/v1"
+    demo.rest_headers = {"Content-Type": "application/json"}
+    demo.run_namespace = uuid.uuid4()
+    return demo
+
+
+class InsertRetryTest(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(demo_supabase_test.time, "sleep")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_429_then_201_succeeds(self):
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            if len(calls) == 1:
+                return httpx.Response(429, json={"message": "Too many requests"})
+            return httpx.Response(201, content=request.content)
+
+        demo = make_demo(handler)
+        result = demo.insert_once("memories", {"title": "t"})
+
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(result.data[0]["title"], "t")
+        # The retry replays the same upsert, so it can't create a duplicate
+        self.assertEqual(orjson.loads(calls[0].content), orjson.loads(calls[1].content))
+
+    def test_503_with_postgrest_code_is_retried(self):
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            if len(calls) == 1:
+                return httpx.Response(503, json={"code": "PGRST001", "message": "unavailable"})
+            return httpx.Response(201, content=request.content)
+
+        make_demo(handler).insert_once("memories", {"title": "t"})
+        self.assertEqual(len(calls), 2)
+
+    def test_client_error_is_not_retried(self):
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            return httpx.Response(409, json={"code": "23505", "message": "duplicate key"})
+
+        with self.assertRaises(demo_supabase_test.APIError) as ctx:
+            make_demo(handler).insert_once("memories", {"title": "t"})
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(ctx.exception.status, 409)
+
+
+class InsertIdTest(unittest.TestCase):
+    def test_identical_rows_in_a_batch_get_distinct_ids(self):
+        def handler(request):
+            return httpx.Response(201, content=request.content)
+
+        result = make_demo(handler).insert_once("messages", [{"content": "hi"}, {"content": "hi"}])
+
+        ids = [row["id"] for row in result.data]
+        self.assertEqual(len(set(ids)), 2)
+        self.assertNotIn("_i", result.data[0])
+
+    def test_ids_are_stable_across_replays(self):
+        demo = make_demo(lambda request: httpx.Response(201, content=request.content))
+        rows = [{"content": "a"}, {"content": "b"}]
+
+        first = demo.insert_once("messages", rows).data
+        second = demo.insert_once("messages", rows).data
+
+        self.assertEqual([r["id"] for r in first], [r["id"] for r in second])
+
+
+if __name__ == "__main__":
+    unittest.main()
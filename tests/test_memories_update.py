@@ -0,0 +1,37 @@
+import unittest
+from unittest import mock
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.auth import get_current_user
+from app.clients.supabase_client import supabase_dependency
+from app.routers import memories
+
+
+def make_client(sb):
+    app = FastAPI()
+    app.include_router(memories.router)
+    app.dependency_overrides[get_current_user] = lambda: {"id": "user-1"}
+    app.dependency_overrides[supabase_dependency] = lambda: sb
+    return TestClient(app)
+
+
+class UpdateMemoryTest(unittest.TestCase):
+    def test_null_title_is_rejected_before_the_update(self):
+        sb = mock.MagicMock()
+        resp = make_client(sb).patch("/memories/m1", json={"title": None})
+        self.assertEqual(resp.status_code, 422)
+        sb.table.assert_not_called()
+
+    def test_null_description_clears_the_column(self):
+        sb = mock.MagicMock()
+        query = sb.table.return_value.update.return_value.eq.return_value.eq.return_value
+        query.select.return_value.single.return_value.execute.return_value.data = {"id": "m1", "description": None}
+        resp = make_client(sb).patch("/memories/m1", json={"description": None})
+        self.assertEqual(resp.status_code, 200)
+        sb.table.return_value.update.assert_called_once_with({"description": None})
+
+
+if __name__ == "__main__":
+    unittest.main()
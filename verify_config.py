@@ -5,21 +5,50 @@ This script checks if all required environment variables are set correctly
 and tests connectivity to Supabase.
 """
 
+import argparse
+import asyncio
 import os
+import re
 import sys
 import json
-import requests
-from dotenv import load_dotenv
-from urllib.parse import urlparse
+from functools import lru_cache
+from _common import Colors, run_all_captured
 
-# Colors for terminal output
-class Colors:
-    GREEN = '\033[92m'
-    YELLOW = '\033[93m'
-    RED = '\033[91m'
-    BLUE = '\033[94m'
-    BOLD = '\033[1m'
-    END = '\033[0m'
+# requests, httpx and dotenv are imported where they are first needed, so
+# --help and the early-failure paths don't pay for loading them
+
+BACKEND_HEALTH_URL = "http://localhost:8000/api/health"
+FRONTEND_URL = "http://localhost:5173"
+
+@lru_cache(maxsize=1)
+def get_session():
+    """Shared session: the probes reuse keep-alive connections, so the two
+    Supabase calls share one TCP+TLS handshake"""
+    import requests
+    from requests.adapters import HTTPAdapter
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+# Exceptions the probes report specially. Only clients that have been
+# imported can have raised, so look them up in sys.modules.
+def connection_errors():
+    errors = ()
+    if 'requests' in sys.modules:
+        errors += (sys.modules['requests'].exceptions.ConnectionError,)
+    if 'httpx' in sys.modules:
+        errors += (sys.modules['httpx'].ConnectError,)
+    return errors
+
+def timeout_errors():
+    errors = ()
+    if 'requests' in sys.modules:
+        errors += (sys.modules['requests'].exceptions.Timeout,)
+    if 'httpx' in sys.modules:
+        errors += (sys.modules['httpx'].TimeoutException,)
+    return errors
 
 def print_header(text):
     print(f"\n{Colors.BOLD}{Colors.BLUE}{'='*60}{Colors.END}")
@@ -56,8 +85,9 @@ def check_backend_config():
     backend_env_path = os.path.join(os.getcwd(), '.env')
     if not os.path.exists(backend_env_path):
         print_error(f"Backend .env file not found at: {backend_env_path}")
-        return False
+        return False, {}
     
+    from dotenv import load_dotenv
     load_dotenv(backend_env_path)
     
     required_vars = [
@@ -71,14 +101,17 @@ def check_backend_config():
     
     all_ok = True
     config = {}
+    # Snapshot the environment once rather than calling os.getenv per variable
+    env = dict(os.environ)
     
     # Check required variables
     for var in required_vars:
-        value = os.getenv(var)
-        if value and value.strip():
+        value = env.get(var, '')
+        stripped = value.strip()
+        if stripped:
             config[var] = value
             # Mask sensitive values in display
-            display_value = value[:20] + "..." if len(value) > 20 else value
+            display_value = stripped[:20] + "..." if len(stripped) > 20 else stripped
             print_success(f"{var}: {display_value}")
         else:
             print_error(f"{var} is missing or empty!")
@@ -86,15 +119,28 @@ def check_backend_config():
     
     # Check optional variables
     for var in optional_vars:
-        value = os.getenv(var)
-        if value and value.strip():
-            display_value = value[:20] + "..." if len(value) > 20 else value
+        stripped = env.get(var, '').strip()
+        if stripped:
+            display_value = stripped[:20] + "..." if len(stripped) > 20 else stripped
             print_info(f"{var}: {display_value} (optional)")
         else:
             print_warning(f"{var} not set (optional)")
     
     return all_ok, config
 
+# One KEY=VALUE assignment per line; comments and blank lines never match
+_ENV_RE = re.compile(rb'(?m)^[ \t]*([A-Za-z_][A-Za-z0-9_]*)[ \t]*=[ \t]*(.*?)[ \t\r]*$')
+
+def parse_env_bytes(data):
+    """Parse the KEY=VALUE lines of an env file's contents in one regex pass"""
+    return {key.decode(): value.decode() for key, value in _ENV_RE.findall(data)}
+
+@lru_cache(maxsize=None)
+def _parse_env_file(path, mtime_ns):
+    """Parse an env file; cached per (path, mtime) so unchanged files aren't re-read"""
+    with open(path, 'rb') as f:
+        return parse_env_bytes(f.read())
+
 def check_frontend_config():
     """Check frontend environment configuration"""
     print_header("Frontend Configuration Check")
@@ -102,24 +148,18 @@ def check_frontend_config():
     frontend_env_path = os.path.join(os.getcwd(), 'frontend', '.env.local')
     if not os.path.exists(frontend_env_path):
         print_error(f"Frontend .env.local file not found at: {frontend_env_path}")
-        return False
+        return False, {}
     
     # Read frontend env file
-    frontend_config = {}
-    with open(frontend_env_path, 'r') as f:
-        for line in f:
-            line = line.strip()
-            if line and not line.startswith('#') and '=' in line:
-                key, value = line.split('=', 1)
-                frontend_config[key.strip()] = value.strip()
+    frontend_config = _parse_env_file(frontend_env_path, os.stat(frontend_env_path).st_mtime_ns)
     
     required_vars = ['VITE_SUPABASE_URL', 'VITE_SUPABASE_ANON_KEY']
     all_ok = True
     
     for var in required_vars:
-        value = frontend_config.get(var, '')
-        if value and value.strip():
-            display_value = value[:20] + "..." if len(value) > 20 else value
+        stripped = frontend_config.get(var, '').strip()
+        if stripped:
+            display_value = stripped[:20] + "..." if len(stripped) > 20 else stripped
             print_success(f"{var}: {display_value}")
         else:
             print_error(f"{var} is missing or empty!")
@@ -127,48 +167,52 @@ def check_frontend_config():
     
     return all_ok, frontend_config
 
+# http(s)://host[:port], capturing the scheme and host
+_URL_RE = re.compile(r'^(https?)://([^/\s]+)')
+
 def validate_url(url, name):
     """Validate URL format"""
     print_info(f"Validating {name} format...")
-    try:
-        result = urlparse(url)
-        if all([result.scheme, result.netloc]):
-            print_success(f"{name} format is valid: {result.scheme}://{result.netloc}")
-            return True
-        else:
-            print_error(f"{name} format is invalid!")
-            return False
-    except Exception as e:
-        print_error(f"Error validating {name}: {str(e)}")
+    m = _URL_RE.match(url)
+    if m:
+        print_success(f"{name} format is valid: {m.group(1)}://{m.group(2)}")
+        return True
+    else:
+        print_error(f"{name} format is invalid!")
         return False
 
-def test_supabase_connectivity(url, anon_key):
+def supabase_probe_requests(url, anon_key):
+    """(url, headers) of the two Supabase probes: REST root, then one memories row"""
+    headers = {
+        "apikey": anon_key,
+        "Authorization": f"Bearer {anon_key}"
+    }
+    return [(f"{url}/rest/v1/", headers), (f"{url}/rest/v1/memories?limit=1", headers)]
+
+def test_supabase_connectivity(url, anon_key, get=None):
     """Test connectivity to Supabase"""
     print_header("Testing Supabase Connectivity")
+    get = get or get_session().get
+    (health_url, headers), (table_url, _) = supabase_probe_requests(url, anon_key)
     
     # Test 1: Health check
     print_info("Testing Supabase REST API...")
     try:
-        health_url = f"{url}/rest/v1/"
-        headers = {
-            "apikey": anon_key,
-            "Authorization": f"Bearer {anon_key}"
-        }
-        response = requests.get(health_url, headers=headers, timeout=10)
+        response = get(health_url, headers=headers, timeout=10)
         
         if response.status_code in [200, 404]:  # 404 is OK for root endpoint
             print_success(f"Supabase REST API is reachable (Status: {response.status_code})")
         else:
             print_warning(f"Unexpected status code: {response.status_code}")
             print_info(f"Response: {response.text[:200]}")
-    except requests.exceptions.ConnectionError:
+    except connection_errors():
         print_error("Connection failed! Cannot reach Supabase URL")
         print_error("Possible issues:")
         print_error("  - URL is incorrect")
         print_error("  - No internet connection")
         print_error("  - Supabase project is paused or deleted")
         return False
-    except requests.exceptions.Timeout:
+    except timeout_errors():
         print_error("Connection timeout! Supabase is not responding")
         return False
     except Exception as e:
@@ -178,8 +222,7 @@ def test_supabase_connectivity(url, anon_key):
     # Test 2: Try to access a table
     print_info("Testing table access (memories table)...")
     try:
-        table_url = f"{url}/rest/v1/memories?limit=1"
-        response = requests.get(table_url, headers=headers, timeout=10)
+        response = get(table_url, headers=headers, timeout=10)
         
         if response.status_code == 200:
             print_success("Successfully connected to 'memories' table")
@@ -199,19 +242,20 @@ def test_supabase_connectivity(url, anon_key):
         print_error(f"Error accessing table: {str(e)}")
         return False
 
-def check_backend_server():
+def check_backend_server(get=None):
     """Check if backend server is running"""
     print_header("Checking Backend Server")
+    get = get or get_session().get
     
     try:
-        response = requests.get("http://localhost:8000/api/health", timeout=5)
+        response = get(BACKEND_HEALTH_URL, timeout=5)
         if response.status_code == 200:
             print_success("Backend server is running on http://localhost:8000")
             return True
         else:
             print_warning(f"Backend responded with status: {response.status_code}")
             return False
-    except requests.exceptions.ConnectionError:
+    except connection_errors():
         print_error("Backend server is NOT running!")
         print_info("Start it with: cd /home/tanmay/Desktop/python-projects/mem0 && source mem0-env/bin/activate && uvicorn app.main:app --reload")
         return False
@@ -219,19 +263,20 @@ def check_backend_server():
         print_error(f"Error checking backend: {str(e)}")
         return False
 
-def check_frontend_server():
+def check_frontend_server(get=None):
     """Check if frontend server is running"""
     print_header("Checking Frontend Server")
+    get = get or get_session().get
     
     try:
-        response = requests.get("http://localhost:5173", timeout=5)
+        response = get(FRONTEND_URL, timeout=5)
         if response.status_code == 200:
             print_success("Frontend server is running on http://localhost:5173")
             return True
         else:
             print_warning(f"Frontend responded with status: {response.status_code}")
             return False
-    except requests.exceptions.ConnectionError:
+    except connection_errors():
         print_error("Frontend server is NOT running!")
         print_info("Start it with: cd /home/tanmay/Desktop/python-projects/mem0/frontend && npm run dev")
         return False
@@ -239,6 +284,29 @@ def check_frontend_server():
         print_error(f"Error checking frontend: {str(e)}")
         return False
 
+async def fetch_all(probe_requests):
+    """GET every (url, headers) concurrently on one event loop and connection pool"""
+    import httpx
+    async with httpx.AsyncClient(
+        timeout=10,
+        limits=httpx.Limits(max_connections=8),
+        follow_redirects=True,
+    ) as client:
+        results = await asyncio.gather(
+            *(client.get(url, headers=headers) for url, headers in probe_requests),
+            return_exceptions=True,
+        )
+    return {url: result for (url, _), result in zip(probe_requests, results)}
+
+def prefetched_get(responses):
+    """Drop-in for get_session().get that serves responses fetched by fetch_all"""
+    def get(url, headers=None, timeout=None):
+        result = responses[url]
+        if isinstance(result, Exception):
+            raise result
+        return result
+    return get
+
 def check_cors_config():
     """Check CORS configuration"""
     print_header("Checking CORS Configuration")
@@ -255,24 +323,13 @@ def check_cors_config():
     
     print_success("CORS appears to be configured correctly in app/main.py")
 
-def check_consistency():
+def check_consistency(backend_config, frontend_config):
     """Check if backend and frontend configs match"""
     print_header("Checking Configuration Consistency")
     
-    # Load both configs
-    load_dotenv('.env')
-    backend_url = os.getenv('SUPABASE_URL', '')
-    backend_key = os.getenv('SUPABASE_ANON_KEY', '')
-    
-    frontend_env_path = 'frontend/.env.local'
-    frontend_config = {}
-    if os.path.exists(frontend_env_path):
-        with open(frontend_env_path, 'r') as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith('#') and '=' in line:
-                    key, value = line.split('=', 1)
-                    frontend_config[key.strip()] = value.strip()
+    # Both configs were already loaded by the backend/frontend checks
+    backend_url = backend_config.get('SUPABASE_URL', '')
+    backend_key = backend_config.get('SUPABASE_ANON_KEY', '')
     
     frontend_url = frontend_config.get('VITE_SUPABASE_URL', '')
     frontend_key = frontend_config.get('VITE_SUPABASE_ANON_KEY', '')
@@ -323,6 +380,11 @@ def provide_recommendations():
     print("   - Open DevTools (F12) and check the Console and Network tabs")
 
 def main():
+    parser = argparse.ArgumentParser(description="Verify the backend/frontend configuration and connectivity")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="fetch all network probes concurrently on one asyncio event loop")
+    args = parser.parse_args()
+    
     print(f"\n{Colors.BOLD}{'='*60}")
     print(f"  Database Configuration Verification Tool")
     print(f"{'='*60}{Colors.END}\n")
@@ -352,23 +414,45 @@ def main():
     if backend_ok and 'SUPABASE_URL' in backend_config:
         validate_url(backend_config['SUPABASE_URL'], "Supabase URL")
     
-    # 4. Test Supabase connectivity
-    if backend_ok and all(key in backend_config for key in ['SUPABASE_URL', 'SUPABASE_ANON_KEY']):
-        results['supabase_connectivity'] = test_supabase_connectivity(
+    # 4-5. Test Supabase connectivity and check the servers. The probes are
+    # independent, so run them concurrently and print each one's output in
+    # order afterwards
+    supabase_ok = backend_ok and all(key in backend_config for key in ['SUPABASE_URL', 'SUPABASE_ANON_KEY'])
+    if args.use_async:
+        # Every request goes out at once from one thread; the checks below
+        # then only report on the prefetched responses
+        probe_requests = [(BACKEND_HEALTH_URL, None), (FRONTEND_URL, None)]
+        if supabase_ok:
+            probe_requests += supabase_probe_requests(
+                backend_config['SUPABASE_URL'],
+                backend_config['SUPABASE_ANON_KEY']
+            )
+        get = prefetched_get(asyncio.run(fetch_all(probe_requests)))
+    else:
+        get = get_session().get
+    
+    probes = {}
+    if supabase_ok:
+        probes['supabase_connectivity'] = lambda: test_supabase_connectivity(
             backend_config['SUPABASE_URL'],
-            backend_config['SUPABASE_ANON_KEY']
+            backend_config['SUPABASE_ANON_KEY'],
+            get
         )
+    probes['backend_server'] = lambda: check_backend_server(get)
+    probes['frontend_server'] = lambda: check_frontend_server(get)
+    
+    outputs = run_all_captured(probes, label="Check")
     
-    # 5. Check servers
-    results['backend_server'] = check_backend_server()
-    results['frontend_server'] = check_frontend_server()
+    for name, (result, output) in outputs.items():
+        sys.stdout.write(output)
+        results[name] = result
     
     # 6. Check CORS
     check_cors_config()
     
     # 7. Check consistency
     if backend_ok and frontend_ok:
-        results['consistency'] = check_consistency()
+        results['consistency'] = check_consistency(backend_config, frontend_config)
     
     # 8. Provide recommendations
     provide_recommendations()